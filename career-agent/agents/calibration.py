@@ -0,0 +1,331 @@
+"""
+Evaluator score calibration — learns per-message_type approval policies from logs.
+
+Offline analysis (prints a report and writes data/calibration.json):
+    python -m agents.calibration
+    python -m agents.calibration --dry-run
+
+Runtime: process_message calls is_approved(evaluation, message_type) instead of
+relying only on the fixed SCORE_THRESHOLD.
+
+How a policy is learned (per message_type, from records with per-attempt scores):
+    - Criterion weights: criteria that historically improved when the reply was
+      rewritten get more weight; criteria that retries did not fix get less.
+      Weights always sum to 5, so the weighted score stays on the 0-10 scale,
+      and `safety` never drops below weight 1.
+    - Threshold: the lowest value (down to MIN_THRESHOLD) at which approving
+      earlier would never have lost quality — i.e. for every historical message
+      the accepted attempt scores no lower than the reply actually sent. Only
+      the evaluator's own scores are checked: there is no signal for "a human
+      rewrote an auto-sent reply" (see extract_samples). Only retried records
+      (more than one attempt) can show that, so the threshold stays at the
+      baseline until at least MIN_RETRIED_SAMPLES of them exist.
+
+The policy only relaxes the baseline: a reply with total_score >= SCORE_THRESHOLD
+is always approved, and a calibrated early approval requires a perfect safety score.
+"""
+
+import argparse
+import datetime
+import json
+import os
+
+from agents.evaluator_agent import SCORE_THRESHOLD
+from tools.file_cache import load_json
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALIBRATION_PATH = os.path.join(_BASE_DIR, "data", "calibration.json")
+
+CRITERIA = ["professional_tone", "clarity", "completeness", "safety", "relevance"]
+
+MIN_THRESHOLD = 5.0       # Never approve below this weighted score
+THRESHOLD_STEP = 0.5
+MIN_SAMPLES = 5           # Message types with fewer usable records keep the baseline
+MIN_RETRIED_SAMPLES = 3   # ...as do types with fewer records that needed a rewrite
+SAFETY_REQUIRED = 2       # Calibrated early approval needs a perfect safety score
+WEIGHT_SMOOTHING = 0.5    # Added to every criterion's mean gain before normalizing
+
+DEFAULT_POLICY = {
+    "threshold": float(SCORE_THRESHOLD),
+    "weights": {c: 1.0 for c in CRITERIA},
+}
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+
+def weighted_score(scores: dict, weights: dict) -> float:
+    return sum(weights.get(c, 1.0) * int(scores.get(c, 0)) for c in CRITERIA)
+
+
+def _policy_approves(scores: dict, policy: dict) -> bool:
+    """Baseline approval OR calibrated approval (weighted score + perfect safety)."""
+    if sum(int(scores.get(c, 0)) for c in CRITERIA) >= SCORE_THRESHOLD:
+        return True
+    return (
+        int(scores.get("safety", 0)) >= SAFETY_REQUIRED
+        and weighted_score(scores, policy["weights"]) >= policy["threshold"]
+    )
+
+
+# ---------------------------------------------------------------------------
+# Offline analysis
+# ---------------------------------------------------------------------------
+
+
+def _normalize_message(message: str) -> str:
+    return " ".join(str(message).lower().split())
+
+
+def extract_samples(logs: list[dict]) -> tuple[dict[str, list[dict]], dict]:
+    """
+    Groups sent replies by message_type with their per-attempt scores.
+
+    Returns:
+        tuple: ({message_type: [sample, ...]}, counters)
+            sample = {"history": [scores, ...], "overridden": bool}
+
+    `overridden` marks a reply whose message text also has a human-written
+    reply in the logs. Human replies are only submitted after a
+    `human_required` escalation, which produces no evaluated reply, so this
+    matches only when the same text was also answered automatically at
+    another time. It almost never fires; counters["overridden"] shows how
+    often it did.
+    """
+    overridden = {
+        _normalize_message(r.get("message", ""))
+        for r in logs
+        if r.get("action") == "human_response_submitted"
+    }
+
+    samples: dict[str, list[dict]] = {}
+    counters = {"sent": 0, "usable": 0, "missing_history": 0, "overridden": 0}
+
+    for record in logs:
+        evaluation = record.get("evaluation")
+        if not isinstance(evaluation, dict) or "scores" not in evaluation:
+            continue
+        counters["sent"] += 1
+
+        attempts = int(record.get("attempts", 1))
+        history = record.get("evaluation_history")
+        if history:
+            history = [h["scores"] for h in history]
+        elif attempts == 1:
+            history = [evaluation["scores"]]  # Single attempt — final scores are the history
+        else:
+            counters["missing_history"] += 1  # Retried before per-attempt scores were logged
+            continue
+
+        counters["usable"] += 1
+        is_overridden = _normalize_message(record.get("message", "")) in overridden
+        counters["overridden"] += is_overridden
+        samples.setdefault(record.get("message_type") or "other", []).append(
+            {"history": history, "overridden": is_overridden}
+        )
+
+    return samples, counters
+
+
+def learn_weights(samples: list[dict]) -> dict:
+    """Weights criteria by how much rewriting historically improved them."""
+    gains = {c: 0.0 for c in CRITERIA}
+    retried = [s for s in samples if len(s["history"]) > 1]
+    for sample in retried:
+        first, final = sample["history"][0], sample["history"][-1]
+        for c in CRITERIA:
+            gains[c] += max(0, int(final.get(c, 0)) - int(first.get(c, 0)))
+
+    n = max(len(retried), 1)
+    raw = {c: gains[c] / n + WEIGHT_SMOOTHING for c in CRITERIA}
+    total = sum(raw.values())
+    weights = {c: 5.0 * raw[c] / total for c in CRITERIA}
+
+    # Safety must never be discounted below its baseline weight
+    if weights["safety"] < 1.0:
+        others = sum(w for c, w in weights.items() if c != "safety")
+        scale = 4.0 / others
+        weights = {c: (1.0 if c == "safety" else w * scale) for c, w in weights.items()}
+
+    return {c: round(w, 3) for c, w in weights.items()}
+
+
+def simulate(samples: list[dict], policy: dict) -> dict:
+    """
+    Replays the retry loop on historical per-attempt scores under `policy`.
+
+    Returns:
+        dict: {"retries": int, "baseline_retries": int, "quality_losses": int}
+    """
+    retries = baseline_retries = losses = 0
+    for sample in samples:
+        history = sample["history"]
+        final_total = sum(int(history[-1].get(c, 0)) for c in CRITERIA)
+        baseline_retries += len(history) - 1
+
+        accepted = len(history) - 1
+        for i, scores in enumerate(history):
+            if _policy_approves(scores, policy):
+                accepted = i
+                break
+        retries += accepted
+
+        if accepted < len(history) - 1:
+            accepted_total = sum(int(history[accepted].get(c, 0)) for c in CRITERIA)
+            if accepted_total < final_total or sample["overridden"]:
+                losses += 1
+
+    return {"retries": retries, "baseline_retries": baseline_retries, "quality_losses": losses}
+
+
+def _retried_count(samples: list[dict]) -> int:
+    return sum(1 for s in samples if len(s["history"]) > 1)
+
+
+def learn_policy(samples: list[dict]) -> dict:
+    """
+    Learns weights, then the lowest loss-free threshold for one message_type.
+
+    Single-attempt records never reach a retry, so they cannot reveal a
+    quality loss; without MIN_RETRIED_SAMPLES retried records the baseline
+    policy is returned unchanged.
+    """
+    best = dict(DEFAULT_POLICY)
+    if _retried_count(samples) < MIN_RETRIED_SAMPLES:
+        return best
+
+    weights = learn_weights(samples)
+
+    threshold = float(SCORE_THRESHOLD)
+    while threshold >= MIN_THRESHOLD:
+        candidate = {"threshold": threshold, "weights": weights}
+        if simulate(samples, candidate)["quality_losses"] > 0:
+            break
+        best = candidate
+        threshold -= THRESHOLD_STEP
+
+    return best
+
+
+def calibrate(logs: list[dict]) -> dict:
+    """
+    Builds the full calibration document from log records.
+
+    Returns:
+        dict: {"generated_at", "default", "message_types": {type: policy + report}, "totals"}
+    """
+    samples_by_type, counters = extract_samples(logs)
+    message_types = {}
+    totals = {"retries": 0, "baseline_retries": 0, "quality_losses": 0}
+
+    for message_type, samples in sorted(samples_by_type.items()):
+        retried = _retried_count(samples)
+        if len(samples) >= MIN_SAMPLES and retried >= MIN_RETRIED_SAMPLES:
+            policy = learn_policy(samples)
+            calibrated = True
+        else:
+            policy = dict(DEFAULT_POLICY)
+            calibrated = False
+
+        result = simulate(samples, policy)
+        for k in totals:
+            totals[k] += result[k]
+
+        message_types[message_type] = {
+            **policy,
+            "calibrated": calibrated,
+            "samples": len(samples),
+            "retried_samples": retried,
+            "baseline_retries": result["baseline_retries"],
+            "retries": result["retries"],
+            "retries_saved": result["baseline_retries"] - result["retries"],
+        }
+
+    return {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "default": DEFAULT_POLICY,
+        "message_types": message_types,
+        "totals": {
+            **counters,
+            **totals,
+            "retries_saved": totals["baseline_retries"] - totals["retries"],
+        },
+    }
+
+
+def print_report(calibration: dict) -> None:
+    totals = calibration["totals"]
+    print("📊 Evaluator calibration report\n")
+    print(
+        f"   Sent replies: {totals['sent']}  usable: {totals['usable']}  "
+        f"(skipped {totals['missing_history']} retried replies without per-attempt scores)"
+    )
+    print(f"   Replies with a matching human-written reply: {totals['overridden']}\n")
+    print(f"   {'message_type':<20} {'n':>4} {'threshold':>9} {'retries':>9} {'saved':>6}  weights")
+    for message_type, p in calibration["message_types"].items():
+        weights = " ".join(f"{c[:4]}={w:.2f}" for c, w in p["weights"].items())
+        marker = "" if p["calibrated"] else "  (baseline — too few samples or retries)"
+        print(
+            f"   {message_type:<20} {p['samples']:>4} {p['threshold']:>9.1f} "
+            f"{p['baseline_retries']:>4}→{p['retries']:<4} {p['retries_saved']:>6}  {weights}{marker}"
+        )
+    print(
+        f"\n   Retries: {totals['baseline_retries']} → {totals['retries']} "
+        f"({totals['retries_saved']} saved, {totals['quality_losses']} replies with lower quality)"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Runtime policy
+# ---------------------------------------------------------------------------
+
+def load_calibration() -> dict | None:
+    """Returns the calibration document, or None if none has been written."""
+    # Reloaded when the file changes, no restart needed
+    return load_json(CALIBRATION_PATH, "calibration file")
+
+
+def get_policy(message_type: str) -> dict:
+    """Returns the calibrated policy for a message type (baseline if none)."""
+    calibration = load_calibration()
+    if not calibration:
+        return DEFAULT_POLICY
+    policy = calibration.get("message_types", {}).get(message_type)
+    if not policy or not policy.get("calibrated"):
+        return calibration.get("default", DEFAULT_POLICY)
+    return policy
+
+
+def is_approved(evaluation: dict, message_type: str) -> bool:
+    """
+    Approval decision for the retry loop.
+
+    Args:
+        evaluation  : Result of evaluate_response()
+        message_type: Type detected by the Career Agent for this reply
+
+    Returns:
+        bool: True if the reply should be sent without another rewrite
+    """
+    return evaluation["approved"] or _policy_approves(
+        evaluation["scores"], get_policy(message_type)
+    )
+
+
+if __name__ == "__main__":
+    from tools.log_store import read_logs
+
+    parser = argparse.ArgumentParser(description="Calibrate evaluator thresholds from logs")
+    parser.add_argument("--output", default=CALIBRATION_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Print the report only")
+    args = parser.parse_args()
+
+    calibration = calibrate(read_logs())
+    print_report(calibration)
+
+    if not args.dry_run:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(calibration, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Calibration saved: {args.output}")
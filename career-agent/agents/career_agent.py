@@ -1,10 +1,8 @@
-import os
-from openai import OpenAI
 from dotenv import load_dotenv
+from tools.http_transport import get_openai_client
 from rag.retriever import retrieve_cv_context, retrieve_identity_context
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
 def generate_response(employer_message: str) -> dict:
@@ -50,7 +48,7 @@ TYPE: [interview_invite | technical_question | job_offer | decline | clarificati
 Leave a blank line after the tag, then write the actual email reply.
 """
 
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": system_prompt},
@@ -1,10 +1,8 @@
 import json
-import os
-from openai import OpenAI
 from dotenv import load_dotenv
+from tools.http_transport import get_openai_client
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 SCORE_THRESHOLD = 7  # Re-generate if below this threshold
 
@@ -61,7 +59,7 @@ Return only JSON, nothing else:
 }}
 """
 
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": eval_prompt}],
         temperature=0.3,
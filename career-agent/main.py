@@ -1,38 +1,45 @@
-import json
 import datetime
 import traceback
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import os
 
 from agents.career_agent import generate_response
-from agents.evaluator_agent import evaluate_response, SCORE_THRESHOLD
+from agents.evaluator_agent import evaluate_response
+from agents.calibration import is_approved
 from tools.notification import (
     notify_new_message,
     notify_response_sent,
     notify_human_needed,
     notify_retry,
 )
-from tools.unknown_detector import detect_unknown
-from rag.pdf_loader import get_vector_store
+from tools.unknown_detector import HUMAN_CONFIDENCE_THRESHOLD, detect_unknown
+from tools import log_store
+from tools.http_transport import close_transport, init_transport, transport_metrics
+from tools.idempotency import IdempotencyConflict, IdempotencyStore, derive_key
+from rag.pdf_loader import close_vector_store, get_vector_store
 
 # ---------------------------------------------------------------------------
 # Lifespan — startup'ta CV'yi indexle
 # ---------------------------------------------------------------------------
 
-# Uygulama başladığında CV PDF'ini okuyup vektör veritabanına yükler;
-# uygulama kapandığında gerekli temizlik işlemlerini yapar.
+# Uygulama başladığında paylaşılan HTTP bağlantı havuzunu açar, CV PDF'ini okuyup
+# vektör veritabanına yükler; uygulama kapandığında bağlantıları kapatır.
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Indexes the CV on startup and cleans up on shutdown."""
+    """Opens the shared HTTP transport, indexes the CV on startup and cleans up on shutdown."""
     print("🚀 Career Agent starting...")
+    init_transport()  # One keep-alive pool for OpenAI, embeddings and Telegram
     get_vector_store()  # First run reads the PDF; subsequent runs load from cache
     print("✅ CV indexed successfully, system ready.")
     yield
+    close_transport()
+    close_vector_store()  # Bound to the closed client — reopened on the next startup
 
 # ---------------------------------------------------------------------------
 # FastAPI app
@@ -54,6 +61,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Idempotent-Replayed"],
 )
 
 
@@ -91,24 +99,12 @@ class HumanResponse(BaseModel):
 # Helper functions
 # ---------------------------------------------------------------------------
 
-LOGS_PATH = os.path.join(os.path.dirname(__file__), "data", "logs.json")
-
-
 # Bir işveren mesajı işlendiğinde oluşan tüm bilgileri (yanıt, skor,
-# girişim sayısı vb.) zaman damgasıyla birlikte data/logs.json dosyasına kaydeder.
+# girişim sayısı vb.) zaman damgasıyla birlikte data/logs.json dosyasına kaydeder;
+# dosya büyüdükçe sıkıştırılmış arşiv segmentlerine döndürülür.
 def log_interaction(data: dict) -> None:
-    """Saves all interactions to data/logs.json."""
-    try:
-        with open(LOGS_PATH, "r", encoding="utf-8") as f:
-            logs = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logs = []
-
-    data["timestamp"] = datetime.datetime.now().isoformat()
-    logs.append(data)
-
-    with open(LOGS_PATH, "w", encoding="utf-8") as f:
-        json.dump(logs, f, indent=2, ensure_ascii=False)
+    """Saves all interactions to data/logs.json (rotated into data/log_archive/)."""
+    log_store.append_log(data)
 
 
 # ---------------------------------------------------------------------------
@@ -116,13 +112,49 @@ def log_interaction(data: dict) -> None:
 # ---------------------------------------------------------------------------
 
 
+# Aynı mesajın tekrar gönderilmesinde pipeline'ı yeniden çalıştırmamak için
+# tamamlanan sonuçları saklar ve eşzamanlı aynı istekleri tek çalıştırmada birleştirir.
+idempotency_store = IdempotencyStore()
+
+
 # İşveren mesajını alır ve tam ajan pipeline'ını çalıştırır:
 # bildirim → insan müdahalesi kontrolü → yanıt üretimi → değerlendirme (max 3 deneme) → kayıt.
+# Aynı Idempotency-Key (veya gönderen + mesaj) ile gelen tekrarlar tek çalıştırmaya bağlanır.
 @app.post("/process-message")
-async def process_message(payload: EmployerMessage):
+async def process_message(
+    payload: EmployerMessage,
+    response: Response,
+    idempotency_key: str | None = Header(None),
+):
     """
     Main endpoint — runs the full agent pipeline.
 
+    Resubmissions are deduplicated: the `Idempotency-Key` header (or a key
+    derived from sender + message hash) coalesces concurrent identical
+    requests onto one execution and replays completed results for
+    IDEMPOTENCY_TTL_SECONDS. Replayed responses carry `Idempotent-Replayed: true`.
+    """
+    fingerprint = derive_key(payload.sender_name, payload.message)
+    key = idempotency_key or fingerprint
+
+    try:
+        result, replayed = await idempotency_store.run(
+            key,
+            fingerprint,
+            lambda: run_in_threadpool(run_pipeline, payload),
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+
+def run_pipeline(payload: EmployerMessage) -> dict:
+    """
+    Runs the full agent pipeline (blocking — called from a worker thread).
+
     Pipeline:
         1. Telegram: new message notification
         2. Unknown Detector: is human intervention required?
@@ -142,7 +174,7 @@ async def process_message(payload: EmployerMessage):
     # ------------------------------------------------------------------
     detection = detect_unknown(payload.message)
 
-    if detection["requires_human"] and detection["confidence_score"] >= 0.8:
+    if detection["requires_human"] and detection["confidence_score"] >= HUMAN_CONFIDENCE_THRESHOLD:
         notify_human_needed(f"{detection['category']}: {detection['reason']}")
         log_interaction(
             {
@@ -164,17 +196,24 @@ async def process_message(payload: EmployerMessage):
     agent_result = generate_response(payload.message)
     final_response = agent_result["response"]
     evaluation = None
+    evaluation_history = []
     attempt = 0
 
     # ------------------------------------------------------------------
     # 4. Evaluator Agent — max 3 attempts
+    #    Approval uses the per-message_type calibrated policy
+    #    (data/calibration.json, see agents/calibration.py) when present
     # ------------------------------------------------------------------
     max_retries = 3
 
     for attempt in range(max_retries):
         evaluation = evaluate_response(payload.message, final_response)
+        evaluation_history.append(
+            {"total_score": evaluation["total_score"], "scores": evaluation["scores"]}
+        )
 
-        if evaluation["approved"]:
+        if is_approved(evaluation, agent_result["message_type"]):
+            evaluation["approved"] = True
             break  # Good enough — exit loop
 
         if attempt < max_retries - 1:
@@ -206,6 +245,7 @@ async def process_message(payload: EmployerMessage):
             "evaluation": evaluation,
             "message_type": agent_result["message_type"],
             "attempts": attempt + 1,
+            "evaluation_history": evaluation_history,
             "detection": detection,
         }
     )
@@ -225,9 +265,10 @@ async def process_message(payload: EmployerMessage):
 
 
 # İnsan müdahalesi gerektiğinde kullanıcının yazdığı yanıtı alır,
-# logs.json'a kaydeder ve gönderilen yanıtı geri döndürür.
+# logs.json'a kaydeder ve gönderilen yanıtı geri döndürür. Kayıt rotasyonu
+# tetikleyebildiği (segment sıkıştırma) için düz `def` — thread pool'da çalışır.
 @app.post("/submit-human-response")
-async def submit_human_response(payload: HumanResponse):
+def submit_human_response(payload: HumanResponse):
     """
     Human types their own reply after intervention was required.
     Logs the interaction and returns the submitted response.
@@ -250,26 +291,48 @@ async def submit_human_response(payload: HumanResponse):
     }
 
 
-# data/logs.json dosyasındaki tüm etkileşim kayıtlarını JSON olarak döndürür.
+# Güncel log dosyası ve arşiv segmentlerindeki etkileşim kayıtlarını
+# kronolojik sırayla JSON olarak döndürür; tarih ve adet ile sınırlandırılabilir.
+# Dosya okuma bloklayıcı olduğu için uç noktalar düz `def` — FastAPI bunları
+# thread pool'da çalıştırır, event loop'u meşgul etmez.
 @app.get("/logs")
-async def get_logs():
-    """Returns all interaction logs."""
-    try:
-        with open(LOGS_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+def get_logs(
+    since: datetime.datetime | None = None,
+    limit: int = Query(log_store.LOG_READ_DEFAULT_LIMIT, ge=0),
+    include_archived: bool = True,
+):
+    """Returns the most recent `limit` interaction logs across the current file and archived segments."""
+    return log_store.read_logs(since=since, limit=limit, include_archived=include_archived)
 
 
-# data/logs.json dosyasını sıfırlar; tüm kayıtları temizler.
+# Log dosyasını ve tüm arşiv segmentlerini sıfırlar; tüm kayıtları temizler.
 @app.delete("/logs")
-async def clear_logs():
-    """Clears the log file."""
-    with open(LOGS_PATH, "w", encoding="utf-8") as f:
-        json.dump([], f)
+def clear_logs():
+    """Clears the log file and the log archive."""
+    log_store.clear_logs()
     return {"status": "ok", "message": "Logs cleared."}
 
 
+# Log dosyasının ve arşivin kayıt sayısı ile disk kullanımını döndürür.
+@app.get("/logs/stats")
+def logs_stats():
+    """Returns log storage statistics."""
+    return log_store.storage_stats()
+
+
+# Güncel log dosyasını hemen arşive döndürür; saklama süresi ve
+# sıkıştırma politikalarını uygular.
+@app.post("/logs/rotate")
+def rotate_logs():
+    """Forces a log rotation, then applies retention and compaction."""
+    segment = log_store.rotate()
+    return {
+        "status": "ok",
+        "segment": os.path.basename(segment) if segment else None,
+        "stats": log_store.storage_stats(),
+    }
+
+
 # Sunucunun ayakta olup olmadığını kontrol etmek için basit bir sağlık endpoint'i sağlar.
 @app.get("/health")
 async def health():
@@ -277,6 +340,17 @@ async def health():
     return {"status": "ok", "agent": "Career Assistant v1.1"}
 
 
+# Giden HTTP isteklerinin ve açılan bağlantıların sayılarını (bağlantı yeniden
+# kullanım oranı dahil) ve idempotency deposunun durumunu döndürür.
+@app.get("/metrics")
+async def metrics():
+    """Returns outbound HTTP connection-reuse and idempotency metrics."""
+    return {
+        "http": transport_metrics(),
+        "idempotency": idempotency_store.stats(),
+    }
+
+
 # templates/dashboard.html dosyasını sunarak güven skoru görselleştirme panosunu açar.
 @app.get("/dashboard")
 async def dashboard():
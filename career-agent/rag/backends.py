@@ -0,0 +1,108 @@
+# Nearest-neighbour search backends for the vector store
+#
+# Both backends are exact. Measured with rag.bench_backends (dim 1536, 5 queries,
+# k=2), faiss.IndexFlatIP is faster than the NumPy matmul at every index size
+# from 10 to 5000 chunks, so FAISS is the default whenever it is installed. The
+# NumPy backend is the fallback without faiss (and serves empty indexes).
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Above this many chunks the FAISS backend is used instead of NumPy (0 = always FAISS)
+NUMPY_MAX_CHUNKS = int(os.getenv("RAG_NUMPY_MAX_CHUNKS", "0"))
+
+
+def _as_query_matrix(queries) -> np.ndarray:
+    """Returns queries as a contiguous (n, dim) float32 matrix of unit rows."""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    norms = np.linalg.norm(queries, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(queries / norms)
+
+
+class NumpyBackend:
+    """
+    Exact cosine search over a contiguous, L2-normalized (count, dim) matrix.
+    Top-k is one matmul plus argpartition; only the k winners are sorted.
+    """
+
+    name = "numpy"
+
+    def __init__(self, vectors: np.ndarray):
+        # A memory-mapped store is already C-contiguous float32 — no copy made
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search_batch(self, queries, k: int) -> list[list[int]]:
+        """
+        Args:
+            queries: (n, dim) query embeddings (normalized here)
+            k      : Number of neighbours per query
+
+        Returns:
+            list[list[int]]: Row indices per query, best match first
+        """
+        count = len(self.vectors)
+        k = min(k, count)
+        if k <= 0:
+            return [[] for _ in range(len(np.atleast_2d(queries)))]
+
+        scores = _as_query_matrix(queries) @ self.vectors.T  # (n, count)
+
+        if k < count:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(count), scores.shape)
+
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1).tolist()
+
+    def search(self, query, k: int) -> list[int]:
+        return self.search_batch(query, k)[0]
+
+
+class FaissBackend:
+    """Exact inner-product search with faiss.IndexFlatIP for large indexes."""
+
+    name = "faiss"
+
+    def __init__(self, vectors: np.ndarray):
+        import faiss
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.index = faiss.IndexFlatIP(vectors.shape[1])
+        self.index.add(vectors)
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    def search_batch(self, queries, k: int) -> list[list[int]]:
+        k = min(k, self.index.ntotal)
+        if k <= 0:
+            return [[] for _ in range(len(np.atleast_2d(queries)))]
+        _, ids = self.index.search(_as_query_matrix(queries), k)
+        return [[int(i) for i in row if i >= 0] for row in ids]
+
+    def search(self, query, k: int) -> list[int]:
+        return self.search_batch(query, k)[0]
+
+
+def make_backend(vectors: np.ndarray, max_numpy_chunks: int = NUMPY_MAX_CHUNKS):
+    """
+    Picks the search backend for an index of normalized vectors.
+
+    Uses NumPy up to `max_numpy_chunks` rows (none by default), FAISS above
+    that. Falls back to NumPy if faiss is not installed.
+    """
+    if len(vectors) > max_numpy_chunks:
+        try:
+            return FaissBackend(vectors)
+        except ImportError:
+            print("⚠️  faiss not installed — using NumPy search")
+    return NumpyBackend(vectors)
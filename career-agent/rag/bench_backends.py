@@ -0,0 +1,101 @@
+"""
+Micro-benchmark for the vector search backends (no API calls, synthetic data).
+
+    python -m rag.bench_backends
+    python -m rag.bench_backends --sizes 30 500 5000 50000 --dim 1536 --queries 5
+
+For each index size it times:
+    numpy        — NumpyBackend, one query at a time
+    numpy-batch  — NumpyBackend, all queries in one matmul
+    faiss        — FaissBackend (IndexFlatIP), all queries in one call
+    langchain    — LangChain FAISS wrapper, one similarity_search_by_vector per query
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from rag.backends import FaissBackend, NumpyBackend, _as_query_matrix
+
+
+def _time_per_round(fn, repeat: int) -> float:
+    """Returns the median wall time of `fn()` in microseconds."""
+    fn()  # Warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def _langchain_store(vectors: np.ndarray):
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import Embeddings
+
+    class _Unused(Embeddings):
+        def embed_documents(self, texts):
+            raise NotImplementedError
+
+        def embed_query(self, text):
+            raise NotImplementedError
+
+    pairs = [(f"chunk {i}", vec) for i, vec in enumerate(vectors.tolist())]
+    return FAISS.from_embeddings(pairs, _Unused())
+
+
+def run(sizes: list[int], dim: int, n_queries: int, k: int, repeat: int) -> None:
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((n_queries, dim), dtype=np.float32)
+
+    print(f"dim={dim}  queries/round={n_queries}  k={k}  (median µs per round)\n")
+    print(f"{'chunks':>8} {'numpy':>12} {'numpy-batch':>12} {'faiss':>12} {'langchain':>12}")
+
+    for size in sizes:
+        vectors = _as_query_matrix(rng.standard_normal((size, dim), dtype=np.float32))
+        row = {}
+
+        numpy_backend = NumpyBackend(vectors)
+        row["numpy"] = _time_per_round(
+            lambda: [numpy_backend.search(q, k) for q in queries], repeat
+        )
+        row["numpy-batch"] = _time_per_round(
+            lambda: numpy_backend.search_batch(queries, k), repeat
+        )
+
+        try:
+            faiss_backend = FaissBackend(vectors)
+            row["faiss"] = _time_per_round(
+                lambda: faiss_backend.search_batch(queries, k), repeat
+            )
+        except ImportError:
+            row["faiss"] = None
+
+        try:
+            store = _langchain_store(vectors)
+            query_lists = queries.tolist()
+            row["langchain"] = _time_per_round(
+                lambda: [store.similarity_search_by_vector(q, k=k) for q in query_lists],
+                repeat,
+            )
+        except ImportError:
+            row["langchain"] = None
+
+        cells = [
+            f"{row[name]:>12.1f}" if row[name] is not None else f"{'n/a':>12}"
+            for name in ("numpy", "numpy-batch", "faiss", "langchain")
+        ]
+        print(f"{size:>8} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark vector search backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[30, 100, 1000, 5000, 20000])
+    parser.add_argument("--dim", type=int, default=1536)  # text-embedding-3-small
+    parser.add_argument("--queries", type=int, default=5)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    run(args.sizes, args.dim, args.queries, args.k, args.repeat)
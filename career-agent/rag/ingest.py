@@ -0,0 +1,186 @@
+"""
+PDF ingestion pipeline: parallel page parsing → streamed chunking →
+concurrent embedding batches → incremental vector store writes.
+
+    python -m rag.ingest
+    python -m rag.ingest --pdf data/cv.pdf --out data/vector_store_mmap --workers 4
+
+Stages overlap: pages are split as soon as their parse finishes, chunks are
+grouped into size-bounded embedding batches, up to EMBED_CONCURRENCY batches
+are in flight at once, and finished batches are appended to the store in
+document order.
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from pypdf import PdfReader
+
+from rag.mmap_store import MmapStoreWriter
+
+load_dotenv()
+
+# chunk_size: max characters per chunk
+# chunk_overlap: overlap between chunks (preserves context)
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+# Page parsing — below INGEST_PARALLEL_MIN_PAGES a process pool costs more than it saves
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_PARALLEL_MIN_PAGES = int(os.getenv("INGEST_PARALLEL_MIN_PAGES", "8"))
+
+# Embedding batches — a batch is sent when either limit is reached
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_BATCH_MAX_CHARS = int(os.getenv("EMBED_BATCH_MAX_CHARS", "60000"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+
+
+def make_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        separators=["\n\n", "\n", " ", ""],
+    )
+
+
+def _extract_pages(pdf_path: str, start: int, end: int) -> list[tuple[int, str]]:
+    """Worker: extracts the text of pages [start, end). Runs in a child process."""
+    reader = PdfReader(pdf_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def _page_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    """Splits pages into ~4 ranges per worker so slow pages don't stall a worker."""
+    parts = max(1, min(page_count, workers * 4))
+    size = -(-page_count // parts)  # Ceiling division
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def iter_pages(pdf_path: str, workers: int = INGEST_WORKERS):
+    """
+    Yields (page_index, text) in page order. Uses a process pool for long
+    PDFs and parses serially for short ones.
+    """
+    page_count = len(PdfReader(pdf_path).pages)
+
+    if workers <= 1 or page_count < INGEST_PARALLEL_MIN_PAGES:
+        yield from _extract_pages(pdf_path, 0, page_count)
+        return
+
+    ranges = _page_ranges(page_count, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order as soon as each range is ready
+        for pages in pool.map(_extract_pages, [pdf_path] * len(ranges), *zip(*ranges)):
+            yield from pages
+
+
+def iter_batches(chunks, max_size: int = EMBED_BATCH_SIZE, max_chars: int = EMBED_BATCH_MAX_CHARS):
+    """Groups a stream of chunks into batches bounded by count and total characters."""
+    batch, chars = [], 0
+    for chunk in chunks:
+        length = len(chunk.page_content)
+        if batch and (len(batch) >= max_size or chars + length > max_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(chunk)
+        chars += length
+    if batch:
+        yield batch
+
+
+def ingest_pdf(
+    pdf_path: str,
+    store_path: str,
+    embeddings: Embeddings,
+    embedding_model: str = "",
+    workers: int = INGEST_WORKERS,
+    concurrency: int = EMBED_CONCURRENCY,
+    batch_size: int = EMBED_BATCH_SIZE,
+) -> dict:
+    """
+    Parses, chunks, embeds and writes a PDF into a memory-mapped vector store.
+
+    Returns:
+        dict: {"pages", "chunks", "batches", "seconds", "pages_per_s", "chunks_per_s"}
+    """
+    splitter = make_splitter()
+    stats = {"pages": 0, "chunks": 0, "batches": 0}
+    start = time.perf_counter()
+
+    def chunk_stream():
+        for page_index, text in iter_pages(pdf_path, workers):
+            stats["pages"] += 1
+            page = Document(page_content=text, metadata={"source": pdf_path, "page": page_index})
+            yield from splitter.split_documents([page])
+
+    writer = None
+    in_flight = deque()
+
+    def write_oldest():
+        nonlocal writer
+        batch, future = in_flight.popleft()
+        vectors = future.result()
+        if writer is None:
+            writer = MmapStoreWriter(store_path, len(vectors[0]), embedding_model)
+        writer.add(vectors, batch)
+        stats["chunks"] += len(batch)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for batch in iter_batches(chunk_stream(), max_size=batch_size):
+                in_flight.append(
+                    (batch, pool.submit(embeddings.embed_documents, [c.page_content for c in batch]))
+                )
+                stats["batches"] += 1
+                # Backpressure: write finished batches in order, keep the pool busy
+                while len(in_flight) > concurrency:
+                    write_oldest()
+            while in_flight:
+                write_oldest()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+
+    if writer is None:
+        raise ValueError(f"No text could be extracted from {pdf_path}")
+    writer.close()
+
+    seconds = time.perf_counter() - start
+    stats["seconds"] = seconds
+    stats["pages_per_s"] = stats["pages"] / seconds if seconds else 0.0
+    stats["chunks_per_s"] = stats["chunks"] / seconds if seconds else 0.0
+    return stats
+
+
+if __name__ == "__main__":
+    from rag.pdf_loader import CV_PDF_PATH, EMBEDDING_MODEL, MMAP_STORE_PATH, make_embeddings
+
+    parser = argparse.ArgumentParser(description="Index a PDF CV into the vector store")
+    parser.add_argument("--pdf", default=CV_PDF_PATH)
+    parser.add_argument("--out", default=MMAP_STORE_PATH)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="Page parsing processes")
+    parser.add_argument("--concurrency", type=int, default=EMBED_CONCURRENCY, help="Embedding requests in flight")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks per embedding request")
+    args = parser.parse_args()
+
+    print(f"📄 Ingesting {args.pdf}...")
+    stats = ingest_pdf(
+        args.pdf,
+        args.out,
+        make_embeddings(),
+        embedding_model=EMBEDDING_MODEL,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+    )
+    print(f"   → {stats['pages']} pages, {stats['chunks']} chunks, {stats['batches']} embedding batches")
+    print(f"   → {stats['seconds']:.2f} s  ({stats['pages_per_s']:.1f} pages/s, {stats['chunks_per_s']:.1f} chunks/s)")
+    print(f"✅ Vector store saved: {args.out}")
@@ -0,0 +1,281 @@
+# Pickle-free, memory-mapped vector store format
+#
+# On-disk layout (one directory):
+#   vectors.f32   — 64-byte header + raw little-endian float32 rows (count × dim),
+#                   L2-normalized so inner product == cosine similarity
+#   chunks.jsonl  — first line is a format header, then one {"text", "metadata"}
+#                   object per row, in the same order as vectors.f32
+#
+# Opening a store maps vectors.f32 read-only, so every worker process shares the
+# same page-cache pages instead of holding its own copy of the index.
+import json
+import os
+import shutil
+import struct
+import sys
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag.backends import make_backend
+
+FORMAT_NAME = "cv-vector-store"
+FORMAT_VERSION = 1
+
+VECTORS_FILE = "vectors.f32"
+CHUNKS_FILE = "chunks.jsonl"
+
+_MAGIC = b"CVVSTORE"
+# magic (8s) | version (I) | dim (I) | count (Q) | flags (I) — padded to 64 bytes
+_HEADER_STRUCT = struct.Struct("<8sIIQI")
+HEADER_SIZE = 64
+
+_FLAG_NORMALIZED = 1
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Returns a float32 copy of `vectors` with each row scaled to unit length."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _pack_header(dim: int, count: int) -> bytes:
+    header = _HEADER_STRUCT.pack(_MAGIC, FORMAT_VERSION, dim, count, _FLAG_NORMALIZED)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+
+def read_header(path: str) -> dict:
+    """
+    Reads and validates the binary header of a vectors.f32 file.
+
+    Returns:
+        dict: {"version": int, "dim": int, "count": int, "normalized": bool}
+    """
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"Truncated vector file header: {path}")
+
+    magic, version, dim, count, flags = _HEADER_STRUCT.unpack_from(raw)
+    if magic != _MAGIC:
+        raise ValueError(f"Not a {FORMAT_NAME} vector file: {path}")
+    if version > FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported vector store version {version} (this build reads up to {FORMAT_VERSION})"
+        )
+
+    expected_size = HEADER_SIZE + dim * count * 4
+    if os.path.getsize(path) < expected_size:
+        raise ValueError(f"Vector file is shorter than its header declares: {path}")
+
+    return {
+        "version": version,
+        "dim": dim,
+        "count": count,
+        "normalized": bool(flags & _FLAG_NORMALIZED),
+    }
+
+
+class MmapStoreWriter:
+    """
+    Writes a store incrementally: rows are appended as they arrive and the
+    header row count is patched on close(). Output goes to a temporary
+    directory that replaces `path` only once everything has been written.
+    """
+
+    def __init__(self, path: str, dim: int, embedding_model: str = ""):
+        self.path = path
+        self.dim = dim
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(self._tmp_path)
+
+        self._vectors_file = open(os.path.join(self._tmp_path, VECTORS_FILE), "wb")
+        self._vectors_file.write(_pack_header(dim, 0))
+
+        self._chunks_file = open(os.path.join(self._tmp_path, CHUNKS_FILE), "w", encoding="utf-8")
+        header = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "dim": dim,
+            "embedding_model": embedding_model,
+        }
+        self._chunks_file.write(json.dumps(header) + "\n")
+
+    def add(self, vectors, documents: list[Document]) -> None:
+        """Appends a batch of embedding rows and their source documents."""
+        vectors = _normalize(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+        if len(vectors) != len(documents):
+            raise ValueError("Number of vectors and documents must match")
+
+        self._vectors_file.write(vectors.astype("<f4", copy=False).tobytes())
+        for doc in documents:
+            row = {"text": doc.page_content, "metadata": doc.metadata}
+            self._chunks_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.count += len(documents)
+
+    def close(self) -> None:
+        """Finalizes the header and atomically moves the store into place."""
+        self._vectors_file.seek(0)
+        self._vectors_file.write(_pack_header(self.dim, self.count))
+        self._vectors_file.close()
+        self._chunks_file.close()
+
+        old_path = f"{self.path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, old_path)
+        os.replace(self._tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def abort(self) -> None:
+        """Discards a partially written store."""
+        self._vectors_file.close()
+        self._chunks_file.close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_store(path: str, vectors, documents: list[Document], embedding_model: str = "") -> None:
+    """Writes a complete store in one go."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    with MmapStoreWriter(path, vectors.shape[1], embedding_model) as writer:
+        writer.add(vectors, documents)
+
+
+class MmapVectorStore:
+    """
+    Read-only vector store backed by a memory-mapped vectors.f32 file.
+
+    Exposes the same `similarity_search(query, k)` interface the retriever
+    uses on LangChain's FAISS store, returning `Document` objects. Search is
+    delegated to a backend from rag.backends (NumPy or FAISS, by index size).
+    """
+
+    def __init__(self, path: str, embeddings: Embeddings):
+        self.path = path
+        self.embeddings = embeddings
+
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        header = read_header(vectors_path)
+        self.dim = header["dim"]
+        self.count = header["count"]
+
+        # np.memmap cannot map a zero-length region
+        if self.count:
+            self.vectors = np.memmap(
+                vectors_path,
+                dtype="<f4",
+                mode="r",
+                offset=HEADER_SIZE,
+                shape=(self.count, self.dim),
+            )
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+
+        self.documents = self._load_documents(os.path.join(path, CHUNKS_FILE))
+        self.embedding_model = self._chunks_header.get("embedding_model", "")
+        self.backend = make_backend(self.vectors)
+
+    def _load_documents(self, chunks_path: str) -> list[Document]:
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            self._chunks_header = json.loads(f.readline())
+            if self._chunks_header.get("format") != FORMAT_NAME:
+                raise ValueError(f"Not a {FORMAT_NAME} chunk file: {chunks_path}")
+            documents = []
+            for line in f:
+                row = json.loads(line)
+                documents.append(Document(page_content=row["text"], metadata=row.get("metadata", {})))
+
+        if len(documents) != self.count:
+            raise ValueError(
+                f"Chunk file has {len(documents)} rows but vector file has {self.count}"
+            )
+        return documents
+
+    def __len__(self) -> int:
+        return self.count
+
+    def similarity_search_by_vector(self, embedding, k: int = 4) -> list[Document]:
+        """Returns the k documents closest (cosine) to the given embedding."""
+        return [self.documents[i] for i in self.backend.search(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4) -> list[Document]:
+        """Embeds the query text and returns the k most similar documents."""
+        return self.similarity_search_by_vector(self.embeddings.embed_query(query), k=k)
+
+    def similarity_search_batch(self, queries: list[str], k: int = 4) -> list[list[Document]]:
+        """
+        Runs several queries in one pass: a single embedding request and a
+        single search over the whole query matrix.
+
+        Returns:
+            list[list[Document]]: Top-k documents per query, in query order
+        """
+        if not queries:
+            return []
+        query_vectors = self.embeddings.embed_documents(queries)
+        return [
+            [self.documents[i] for i in row]
+            for row in self.backend.search_batch(query_vectors, k)
+        ]
+
+
+def open_vector_store(path: str, embeddings: Embeddings) -> MmapVectorStore:
+    """Opens a store directory written by MmapStoreWriter / write_store."""
+    return MmapVectorStore(path, embeddings)
+
+
+def convert_faiss_store(src_path: str, dst_path: str, embeddings: Embeddings) -> int:
+    """
+    Converts a LangChain FAISS directory (index.faiss + index.pkl) to this format.
+
+    This is the one place index.pkl is still unpickled — run it only on
+    directories you created yourself.
+
+    Returns:
+        int: Number of chunks converted
+    """
+    from langchain_community.vectorstores import FAISS
+
+    legacy = FAISS.load_local(src_path, embeddings, allow_dangerous_deserialization=True)
+    total = legacy.index.ntotal
+    vectors = legacy.index.reconstruct_n(0, total)
+    documents = [
+        legacy.docstore.search(legacy.index_to_docstore_id[i]) for i in range(total)
+    ]
+
+    model = getattr(embeddings, "model", "")
+    write_store(dst_path, vectors, documents, embedding_model=model)
+    return total
+
+
+if __name__ == "__main__":
+    # python -m rag.mmap_store convert [SRC] [DST]
+    from rag.pdf_loader import MMAP_STORE_PATH, VECTOR_STORE_PATH, make_embeddings
+
+    if len(sys.argv) < 2 or sys.argv[1] != "convert":
+        print("Usage: python -m rag.mmap_store convert [SRC_FAISS_DIR] [DST_DIR]")
+        sys.exit(1)
+
+    src = sys.argv[2] if len(sys.argv) > 2 else VECTOR_STORE_PATH
+    dst = sys.argv[3] if len(sys.argv) > 3 else MMAP_STORE_PATH
+
+    n = convert_faiss_store(src, dst, make_embeddings())
+    print(f"✅ Converted {n} chunks: {src} → {dst}")
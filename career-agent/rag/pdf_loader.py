@@ -1,78 +1,100 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from dotenv import load_dotenv
+from tools.http_transport import get_http_client
+from rag.ingest import ingest_pdf
+from rag.mmap_store import MmapVectorStore, open_vector_store
 
 load_dotenv()
 
 # Paths relative to the project root
 _BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-VECTOR_STORE_PATH = os.path.join(_BASE_DIR, "data", "vector_store")
+VECTOR_STORE_PATH = os.path.join(_BASE_DIR, "data", "vector_store")  # Legacy FAISS + pickle
+MMAP_STORE_PATH = os.path.join(_BASE_DIR, "data", "vector_store_mmap")
 CV_PDF_PATH = os.path.join(_BASE_DIR, "data", "cv.pdf")
 
+EMBEDDING_MODEL = "text-embedding-3-small"  # Cheap and good enough
+# Token-length check before embedding. It loads tiktoken's encoding, which is
+# downloaded on first use outside the shared HTTP client; the replay harness
+# turns it off to stay offline (chunks are far below the model's context length)
+EMBEDDING_CHECK_CTX_LENGTH = os.getenv("EMBEDDING_CHECK_CTX_LENGTH", "1") != "0"
 
-def build_vector_store() -> FAISS:
-    """
-    Reads the PDF CV, splits it into chunks, and builds a FAISS vector store.
-    If a vector store already exists on disk, loads it instead.
-    """
-    embeddings = OpenAIEmbeddings(
+
+def make_embeddings() -> OpenAIEmbeddings:
+    """Returns the embedding client used for both indexing and queries."""
+    return OpenAIEmbeddings(
         openai_api_key=os.getenv("OPENAI_API_KEY"),
-        model="text-embedding-3-small",  # Cheap and good enough
+        model=EMBEDDING_MODEL,
+        http_client=get_http_client(),  # Shared connection pool
+        check_embedding_ctx_length=EMBEDDING_CHECK_CTX_LENGTH,
     )
 
+
+def build_vector_store() -> MmapVectorStore:
+    """
+    Reads the PDF CV, splits it into chunks, embeds them and writes a
+    memory-mapped vector store. If a store already exists on disk, opens it
+    instead. A legacy FAISS directory is never loaded here (it is a pickle);
+    convert it explicitly with `python -m rag.mmap_store convert`.
+    """
+    embeddings = make_embeddings()
+
     # Already indexed — skip recomputation
-    if os.path.exists(VECTOR_STORE_PATH):
+    if os.path.exists(MMAP_STORE_PATH):
         print("✅ Loading existing vector store...")
-        return FAISS.load_local(
-            VECTOR_STORE_PATH,
-            embeddings,
-            allow_dangerous_deserialization=True,
-        )
-
-    print("📄 Reading and indexing PDF...")
+        return open_vector_store(MMAP_STORE_PATH, embeddings)
 
     if not os.path.exists(CV_PDF_PATH):
+        if os.path.exists(VECTOR_STORE_PATH):
+            raise FileNotFoundError(
+                f"Only a legacy FAISS vector store was found: {VECTOR_STORE_PATH}\n"
+                "Convert it once with `python -m rag.mmap_store convert`, "
+                "or place your PDF at data/cv.pdf to rebuild the index."
+            )
         raise FileNotFoundError(
             f"CV not found: {CV_PDF_PATH}\n"
             "Please place your PDF at data/cv.pdf."
         )
 
-    # Load the PDF
-    loader = PyPDFLoader(CV_PDF_PATH)
-    pages = loader.load()
-
-    # Split text into chunks
-    # chunk_size: max characters per chunk
-    # chunk_overlap: overlap between chunks (preserves context)
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        separators=["\n\n", "\n", " ", ""],
-    )
-    chunks = splitter.split_documents(pages)
+    if os.path.exists(VECTOR_STORE_PATH):
+        print(
+            f"ℹ️  Ignoring legacy FAISS vector store ({VECTOR_STORE_PATH}) — rebuilding from the PDF.\n"
+            "   To reuse it instead, run `python -m rag.mmap_store convert` before starting."
+        )
 
-    print(f"   → {len(pages)} pages, {len(chunks)} chunks created")
+    print("📄 Reading and indexing PDF...")
 
-    # Build the vector store and save to disk
-    vector_store = FAISS.from_documents(chunks, embeddings)
+    # Parse pages in parallel, stream chunks into concurrent embedding
+    # batches and write the store incrementally (see rag/ingest.py)
+    stats = ingest_pdf(CV_PDF_PATH, MMAP_STORE_PATH, embeddings, embedding_model=EMBEDDING_MODEL)
 
-    os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
-    vector_store.save_local(VECTOR_STORE_PATH)
+    print(
+        f"   → {stats['pages']} pages, {stats['chunks']} chunks created "
+        f"({stats['pages_per_s']:.1f} pages/s, {stats['chunks_per_s']:.1f} chunks/s)"
+    )
 
-    print(f"✅ Vector store saved: {VECTOR_STORE_PATH}")
-    return vector_store
+    print(f"✅ Vector store saved: {MMAP_STORE_PATH}")
+    return open_vector_store(MMAP_STORE_PATH, embeddings)
 
 
 # Load once at startup — do not reload on every request
-_vector_store: FAISS | None = None
+_vector_store: MmapVectorStore | None = None
 
 
-def get_vector_store() -> FAISS:
-    """Singleton — returns the vector store, building it if necessary."""
+def get_vector_store() -> MmapVectorStore:
+    """Singleton — returns the memory-mapped vector store, building it if necessary."""
     global _vector_store
     if _vector_store is None:
         _vector_store = build_vector_store()
     return _vector_store
+
+
+def close_vector_store() -> None:
+    """
+    Drops the singleton. Its embedding client is bound to the shared HTTP
+    client that existed when it was opened, so call this whenever that client
+    is closed (see close_transport); the next get_vector_store() reopens the
+    store on the current client.
+    """
+    global _vector_store
+    _vector_store = None
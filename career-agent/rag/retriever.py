@@ -1,5 +1,35 @@
 from rag.pdf_loader import get_vector_store
 
+# Fixed queries used by retrieve_identity_context / retrieve_full_cv_summary
+IDENTITY_QUERIES = [
+    "name full name contact email phone",
+    "title position role summary",
+]
+SUMMARY_QUERIES = [
+    "skills experience education",
+    "projects achievements work history",
+    "contact information name title",
+]
+
+# The index does not change at runtime, so the fixed queries are answered once
+# per opened store: (store, {query: docs})
+_fixed_query_docs: tuple[object, dict[str, list]] | None = None
+
+
+def _get_fixed_query_docs() -> dict[str, list]:
+    """
+    Runs all fixed queries in a single batched pass (one embedding request,
+    one search) and caches the top-2 documents per query. The cache follows
+    the store: once it is reopened (close_vector_store), the queries run again.
+    """
+    global _fixed_query_docs
+    store = get_vector_store()
+    if _fixed_query_docs is None or _fixed_query_docs[0] is not store:
+        queries = IDENTITY_QUERIES + SUMMARY_QUERIES
+        results = store.similarity_search_batch(queries, k=2)
+        _fixed_query_docs = (store, dict(zip(queries, results)))
+    return _fixed_query_docs[1]
+
 
 def retrieve_cv_context(query: str, top_k: int = 3) -> str:
     """
@@ -39,18 +69,14 @@ def retrieve_identity_context() -> str:
     Returns:
         str: CV chunks containing identity and contact information
     """
-    identity_queries = [
-        "name full name contact email phone",
-        "title position role summary",
-    ]
+    # dict keeps first-seen order (a set would reorder chunks per process,
+    # making prompts non-deterministic)
+    all_chunks: dict[str, None] = {}
+    fixed_docs = _get_fixed_query_docs()
 
-    all_chunks: set[str] = set()
-    vector_store = get_vector_store()
-
-    for query in identity_queries:
-        docs = vector_store.similarity_search(query, k=2)
-        for doc in docs:
-            all_chunks.add(doc.page_content)
+    for query in IDENTITY_QUERIES:
+        for doc in fixed_docs[query]:
+            all_chunks[doc.page_content] = None
 
     if not all_chunks:
         return ""
@@ -66,18 +92,12 @@ def retrieve_full_cv_summary() -> str:
     Returns:
         str: Up to 8 chunks representing a general CV summary
     """
-    broad_queries = [
-        "skills experience education",
-        "projects achievements work history",
-        "contact information name title",
-    ]
-
-    all_chunks: set[str] = set()
-    vector_store = get_vector_store()
+    # Ordered de-duplication — see retrieve_identity_context
+    all_chunks: dict[str, None] = {}
+    fixed_docs = _get_fixed_query_docs()
 
-    for query in broad_queries:
-        docs = vector_store.similarity_search(query, k=2)
-        for doc in docs:
-            all_chunks.add(doc.page_content)
+    for query in SUMMARY_QUERIES:
+        for doc in fixed_docs[query]:
+            all_chunks[doc.page_content] = None
 
     return "\n\n".join(list(all_chunks)[:8])  # Max 8 chunks
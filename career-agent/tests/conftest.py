@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app modules the same way main.py does (from the project root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from rag import pdf_loader  # noqa: E402
+from tests.fakes import FakeEmbeddings, FakeOpenAI, write_pdf  # noqa: E402
+from tools import http_transport  # noqa: E402
+
+
+@pytest.fixture
+def fake_embeddings() -> FakeEmbeddings:
+    return FakeEmbeddings()
+
+
+@pytest.fixture
+def fake_openai(monkeypatch) -> FakeOpenAI:
+    """Routes the shared HTTP client to an offline fake of the OpenAI API."""
+    fake = FakeOpenAI()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delenv("OPENAI_BASE_URL", raising=False)
+    monkeypatch.setattr(http_transport, "make_pool_transport", lambda: httpx.MockTransport(fake))
+    http_transport.close_transport()
+    yield fake
+    http_transport.close_transport()
+
+
+@pytest.fixture
+def cv_store(tmp_path, monkeypatch):
+    """Points the RAG singletons at a throwaway CV and store."""
+    cv_path = write_pdf(str(tmp_path / "cv.pdf"), ["Jane Doe, Backend Engineer", "Python, FastAPI"])
+    monkeypatch.setattr(pdf_loader, "CV_PDF_PATH", cv_path)
+    monkeypatch.setattr(pdf_loader, "MMAP_STORE_PATH", str(tmp_path / "vector_store_mmap"))
+    monkeypatch.setattr(pdf_loader, "VECTOR_STORE_PATH", str(tmp_path / "vector_store"))
+    pdf_loader.close_vector_store()
+    yield
+    pdf_loader.close_vector_store()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+
+import httpx
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic, offline embeddings: each text maps to a fixed random vector."""
+
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.model = "fake-embedding"
+        self.calls: list[list[str]] = []
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "big")
+        return np.random.default_rng(seed).standard_normal(self.dim).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._vector(text)
+
+
+def write_pdf(path: str, page_texts: list[str]) -> str:
+    """Writes a minimal PDF with one line of Helvetica text per page."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages — filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for text in page_texts:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+class FakeOpenAI:
+    """
+    httpx.MockTransport handler standing in for the OpenAI API: embeddings
+    come from FakeEmbeddings, chat completions return canned replies for the
+    career agent, the evaluator and the unknown detector.
+    """
+
+    def __init__(self):
+        self.embedder = FakeEmbeddings()
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        body = json.loads(request.content) if request.content else {}
+
+        if request.url.path.endswith("/embeddings"):
+            texts = body["input"]
+            texts = [texts] if isinstance(texts, str) else texts
+            data = [
+                {"object": "embedding", "index": i, "embedding": vector}
+                for i, vector in enumerate(self.embedder.embed_documents(texts))
+            ]
+            usage = {"prompt_tokens": 7 * len(texts), "total_tokens": 7 * len(texts)}
+            return httpx.Response(200, json={"object": "list", "data": data, "model": "fake", "usage": usage})
+
+        if request.url.path.endswith("/chat/completions"):
+            prompt = body["messages"][-1]["content"]
+            if "EVALUATE" in prompt:
+                scores = {c: 2 for c in ("professional_tone", "clarity", "completeness", "safety", "relevance")}
+                content = json.dumps({**scores, "feedback": "Good.", "suggestions": ""})
+            elif "Analyze the following" in prompt:
+                content = json.dumps(
+                    {"requires_human": False, "confidence_score": 0.1, "reason": "Routine.", "category": "none"}
+                )
+            else:
+                content = "TYPE: other\n\nThank you for reaching out, I would be happy to talk."
+            usage = {
+                "prompt_tokens": len(request.content) // 4,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": (len(request.content) + len(content)) // 4,
+            }
+            return httpx.Response(
+                200,
+                json={
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                    "usage": usage,
+                },
+            )
+
+        return httpx.Response(200, json={"ok": True})
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from rag.backends import NumpyBackend, _as_query_matrix, make_backend
+
+faiss = pytest.importorskip("faiss")
+from rag.backends import FaissBackend  # noqa: E402
+
+
+def _vectors(count: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return _as_query_matrix(rng.standard_normal((count, dim), dtype=np.float32))
+
+
+@pytest.mark.parametrize("count, k", [(50, 3), (50, 1), (5, 5), (5, 10), (1, 4)])
+def test_numpy_and_faiss_return_the_same_ordered_ids(count, k):
+    vectors = _vectors(count)
+    queries = np.random.default_rng(1).standard_normal((4, 16), dtype=np.float32)
+
+    numpy_ids = NumpyBackend(vectors).search_batch(queries, k)
+    faiss_ids = FaissBackend(vectors).search_batch(queries, k)
+
+    assert numpy_ids == faiss_ids
+    assert all(len(row) == min(k, count) for row in numpy_ids)
+
+
+def test_single_query_search_matches_batch():
+    vectors = _vectors(20)
+    query = np.random.default_rng(2).standard_normal(16, dtype=np.float32)
+
+    for backend in (NumpyBackend(vectors), FaissBackend(vectors)):
+        assert backend.search(query, 3) == backend.search_batch([query], 3)[0]
+
+
+def test_empty_index_returns_no_ids():
+    vectors = np.empty((0, 16), dtype=np.float32)
+    queries = np.ones((2, 16), dtype=np.float32)
+
+    assert NumpyBackend(vectors).search_batch(queries, 3) == [[], []]
+    assert FaissBackend(vectors).search_batch(queries, 3) == [[], []]
+
+
+def test_make_backend_prefers_faiss_for_non_empty_indexes():
+    assert make_backend(_vectors(3)).name == "faiss"
+    assert make_backend(np.empty((0, 16), dtype=np.float32)).name == "numpy"
+    assert make_backend(_vectors(3), max_numpy_chunks=10).name == "numpy"
@@ -0,0 +1,116 @@
+from agents import calibration
+from agents.calibration import DEFAULT_POLICY, calibrate, learn_policy, simulate
+from agents.evaluator_agent import SCORE_THRESHOLD
+
+
+def _scores(professional_tone=2, clarity=2, completeness=2, safety=2, relevance=2) -> dict:
+    return {
+        "professional_tone": professional_tone,
+        "clarity": clarity,
+        "completeness": completeness,
+        "safety": safety,
+        "relevance": relevance,
+    }
+
+
+def _record(message: str, history: list[dict], message_type: str = "interview_invite") -> dict:
+    return {
+        "message": message,
+        "message_type": message_type,
+        "attempts": len(history),
+        "evaluation": {"scores": history[-1]},
+        "evaluation_history": [{"scores": h} for h in history],
+    }
+
+
+def _retried(n: int, first: dict, final: dict | None = None) -> list[dict]:
+    final = final or _scores()
+    return [{"history": [first, final], "overridden": False} for _ in range(n)]
+
+
+def test_single_attempt_records_keep_the_default_policy():
+    logs = [_record(f"message {i}", [_scores()]) for i in range(5)]
+
+    policy = calibrate(logs)["message_types"]["interview_invite"]
+
+    assert policy["calibrated"] is False
+    assert policy["threshold"] == SCORE_THRESHOLD
+    assert policy["retried_samples"] == 0
+    assert learn_policy([{"history": [_scores()], "overridden": False}] * 5) == DEFAULT_POLICY
+
+
+def test_threshold_drops_when_early_attempts_were_already_as_good():
+    # First attempts scored 6/10 with perfect safety, rewrites changed nothing
+    first = _scores(clarity=1, completeness=1, relevance=0)
+    samples = _retried(4, first, final=first)
+
+    policy = learn_policy(samples)
+
+    assert policy["threshold"] < SCORE_THRESHOLD
+    assert simulate(samples, policy) == {"retries": 0, "baseline_retries": 4, "quality_losses": 0}
+
+
+def test_threshold_stops_before_a_quality_loss():
+    # Rewrites improved 6/10 drafts to 10/10 — approving early would lose quality
+    first = _scores(clarity=1, completeness=1, relevance=0)
+    samples = _retried(4, first)
+
+    policy = learn_policy(samples)
+
+    assert simulate(samples, policy)["quality_losses"] == 0
+    assert not calibration._policy_approves(first, policy)
+
+
+def test_overridden_messages_count_as_quality_losses():
+    first = _scores(clarity=1, completeness=1, relevance=0)
+    samples = [{"history": [first, first], "overridden": True} for _ in range(4)]
+
+    policy = learn_policy(samples)
+
+    assert not calibration._policy_approves(first, policy)
+    assert simulate(samples, policy)["retries"] == 4
+
+
+def test_too_few_retried_samples_keep_the_default_policy():
+    first = _scores(clarity=1, completeness=1, relevance=0)
+    logs = [_record(f"single {i}", [_scores()]) for i in range(5)]
+    logs += [_record(f"retried {i}", [first, first]) for i in range(calibration.MIN_RETRIED_SAMPLES - 1)]
+
+    policy = calibrate(logs)["message_types"]["interview_invite"]
+
+    assert policy["calibrated"] is False
+    assert policy["threshold"] == SCORE_THRESHOLD
+
+
+def test_unsafe_early_attempts_are_never_approved_by_calibration():
+    policy = {"threshold": calibration.MIN_THRESHOLD, "weights": DEFAULT_POLICY["weights"]}
+
+    assert not calibration._policy_approves(_scores(clarity=1, completeness=1, safety=1, relevance=1), policy)
+    assert calibration._policy_approves(_scores(safety=2, clarity=1, relevance=0), policy)
+
+
+def test_override_counter_only_matches_the_same_message_text():
+    logs = [_record("Can we talk on Monday?", [_scores()]), _record("Other message", [_scores()])]
+    logs.append({"message": "  can we talk on monday? ", "action": "human_response_submitted"})
+
+    samples, counters = calibration.extract_samples(logs)
+
+    assert counters["overridden"] == 1
+    assert [s["overridden"] for s in samples["interview_invite"]] == [True, False]
+
+
+def test_calibration_file_is_reloaded_when_it_changes(tmp_path, monkeypatch):
+    import json
+    import os
+
+    path = tmp_path / "calibration.json"
+    monkeypatch.setattr(calibration, "CALIBRATION_PATH", str(path))
+    assert calibration.get_policy("interview_invite") == DEFAULT_POLICY
+
+    policy = {"threshold": 6.0, "weights": DEFAULT_POLICY["weights"], "calibrated": True}
+    path.write_text(json.dumps({"default": DEFAULT_POLICY, "message_types": {"interview_invite": policy}}))
+    assert calibration.get_policy("interview_invite")["threshold"] == 6.0
+
+    path.write_text("{not json")
+    os.utime(path, (1, 1))
+    assert calibration.get_policy("interview_invite") == DEFAULT_POLICY
@@ -0,0 +1,39 @@
+import json
+import os
+
+from tools.file_cache import load_json
+
+
+def test_missing_file_returns_none(tmp_path):
+    assert load_json(str(tmp_path / "missing.json")) is None
+
+
+def test_document_is_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps({"v": 1}))
+    os.utime(path, (100, 100))
+
+    first = load_json(str(path))
+    assert first == {"v": 1}
+    assert load_json(str(path)) is first  # Not re-read
+
+    path.write_text(json.dumps({"v": 2}))
+    os.utime(path, (200, 200))
+    assert load_json(str(path)) == {"v": 2}
+
+
+def test_unreadable_file_returns_none_and_warns(tmp_path, capsys):
+    path = tmp_path / "doc.json"
+    path.write_text("{broken")
+
+    assert load_json(str(path), "test model") is None
+    assert "Could not read test model" in capsys.readouterr().out
+
+
+def test_deleted_file_is_dropped_from_the_cache(tmp_path):
+    path = tmp_path / "doc.json"
+    path.write_text("{}")
+    assert load_json(str(path)) == {}
+
+    path.unlink()
+    assert load_json(str(path)) is None
@@ -0,0 +1,82 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from rag import pdf_loader, retriever
+from rag.mmap_store import VECTORS_FILE
+from tools import http_transport
+
+
+def test_clients_share_one_pool_and_reset_on_close(fake_openai):
+    client = http_transport.init_transport()
+    assert http_transport.get_http_client() is client
+    assert http_transport.init_transport() is client
+    assert http_transport.get_openai_client()._client is client
+    assert http_transport.get_openai_client() is http_transport.get_openai_client()
+
+    http_transport.close_transport()
+    assert client.is_closed
+    assert http_transport.get_http_client() is not client
+    assert http_transport.get_openai_client()._client is http_transport.get_http_client()
+
+
+def test_client_uses_configured_timeouts(fake_openai, monkeypatch):
+    monkeypatch.setattr(http_transport, "HTTP_READ_TIMEOUT", 12.5)
+    timeout = http_transport.init_transport().timeout
+    assert timeout.read == 12.5
+    assert timeout.connect == http_transport.HTTP_CONNECT_TIMEOUT
+    assert http_transport.get_openai_client().timeout == timeout
+
+
+def test_metrics_count_requests_per_host(fake_openai):
+    client = http_transport.init_transport()
+    client.get("https://api.telegram.org/bot/getMe")
+    client.get("https://api.telegram.org/bot/getMe")
+    client.get("https://api.openai.com/v1/models")
+
+    metrics = http_transport.transport_metrics()
+    assert metrics["requests"] == 3
+    assert metrics["hosts"]["api.telegram.org"]["requests"] == 2
+    assert metrics["hosts"]["api.openai.com"]["http_versions"] == {"HTTP/1.1": 1}
+
+    http_transport.close_transport()
+    http_transport.init_transport()
+    assert http_transport.transport_metrics()["requests"] == 0
+
+
+def test_lifespan_can_run_twice_in_one_process(fake_openai, cv_store, monkeypatch):
+    from main import app
+
+    monkeypatch.setattr(pdf_loader, "EMBEDDING_CHECK_CTX_LENGTH", False)  # No tiktoken download
+
+    built_at = []
+    for _ in range(2):
+        with TestClient(app):
+            # Both calls embed a query through the store opened in this lifespan
+            assert "Jane Doe" in retriever.retrieve_cv_context("Who is the candidate?")
+            assert "Python" in retriever.retrieve_full_cv_summary()
+            built_at.append(os.path.getmtime(os.path.join(pdf_loader.MMAP_STORE_PATH, VECTORS_FILE)))
+        assert http_transport._client is None
+        assert pdf_loader._vector_store is None
+
+    assert built_at[0] == built_at[1]  # Reopened on the second startup, not rebuilt
+
+
+def test_telegram_uses_shared_timeouts_with_its_own_read_timeout(fake_openai, monkeypatch):
+    from tools import notification
+
+    monkeypatch.setattr(notification, "TELEGRAM_TOKEN", "token")
+    monkeypatch.setattr(notification, "TELEGRAM_CHAT_ID", "42")
+    monkeypatch.setattr(notification, "TELEGRAM_READ_TIMEOUT", 3.0)
+    monkeypatch.setattr(http_transport, "HTTP_CONNECT_TIMEOUT", 1.5)
+
+    assert notification.send_notification("hello") is True
+
+    [request] = fake_openai.requests
+    assert request.url.host == "api.telegram.org"
+    assert request.extensions["timeout"] == {
+        "connect": 1.5,
+        "read": 3.0,
+        "write": http_transport.HTTP_WRITE_TIMEOUT,
+        "pool": http_transport.HTTP_POOL_TIMEOUT,
+    }
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from tools.idempotency import IdempotencyConflict, IdempotencyStore, derive_key
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class Pipeline:
+    """Counts runs and blocks until released, so tests control when it finishes."""
+
+    def __init__(self, result="reply", error: Exception | None = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_derive_key_ignores_surrounding_whitespace():
+    assert derive_key("ACME", "Hello") == derive_key(" ACME ", "Hello\n")
+    assert derive_key("ACME", "Hello") != derive_key("ACME", "Hello!")
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_share_one_run():
+    store = IdempotencyStore()
+    pipeline = Pipeline()
+
+    calls = [asyncio.create_task(store.run("k", "fp", pipeline)) for _ in range(3)]
+    await asyncio.sleep(0)
+    pipeline.release.set()
+    results = await asyncio.gather(*calls)
+
+    assert pipeline.calls == 1
+    assert results == [("reply", False), ("reply", True), ("reply", True)]
+    assert await store.run("k", "fp", pipeline) == ("reply", True)
+    assert store.stats() == {"in_flight": 0, "stored": 1}
+
+
+@pytest.mark.anyio
+async def test_key_reuse_with_different_body_conflicts():
+    store = IdempotencyStore()
+    pipeline = Pipeline()
+    pipeline.release.set()
+    await store.run("k", "fp", pipeline)
+
+    with pytest.raises(IdempotencyConflict):
+        await store.run("k", "other", pipeline)
+
+
+@pytest.mark.anyio
+async def test_failure_reaches_every_waiter_and_is_not_stored():
+    store = IdempotencyStore()
+    pipeline = Pipeline(error=RuntimeError("boom"))
+
+    calls = [asyncio.create_task(store.run("k", "fp", pipeline)) for _ in range(2)]
+    await asyncio.sleep(0)
+    pipeline.release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert pipeline.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert store.stats() == {"in_flight": 0, "stored": 0}
+
+    pipeline.error = None
+    assert await store.run("k", "fp", pipeline) == ("reply", False)
+    assert pipeline.calls == 2
+
+
+@pytest.mark.anyio
+async def test_cancelled_leader_does_not_cancel_waiters_or_lose_result():
+    store = IdempotencyStore()
+    pipeline = Pipeline()
+
+    leader = asyncio.create_task(store.run("k", "fp", pipeline))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(store.run("k", "fp", pipeline))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    pipeline.release.set()
+    assert await waiter == ("reply", True)
+    assert pipeline.calls == 1
+    assert await store.run("k", "fp", pipeline) == ("reply", True)
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_the_run():
+    store = IdempotencyStore()
+    pipeline = Pipeline()
+
+    leader = asyncio.create_task(store.run("k", "fp", pipeline))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(store.run("k", "fp", pipeline))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    pipeline.release.set()
+    assert await leader == ("reply", False)
+    assert waiter.cancelled()
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from rag import ingest
+from rag.ingest import _page_ranges, ingest_pdf, iter_batches, iter_pages
+from rag.mmap_store import open_vector_store
+from tests.fakes import FakeEmbeddings, write_pdf
+
+PAGES = [f"Page {i} of the test CV with some text" for i in range(12)]
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    return write_pdf(str(tmp_path / "cv.pdf"), PAGES)
+
+
+class SlowFirstEmbeddings(FakeEmbeddings):
+    """Earlier batches finish later, so completion order is the reverse of document order."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._batches = 0
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self._batches += 1
+            delay = max(0.0, 0.05 - 0.01 * self._batches)
+        time.sleep(delay)
+        return super().embed_documents(texts)
+
+
+class FailingEmbeddings(FakeEmbeddings):
+    def __init__(self, fail_on_batch: int):
+        super().__init__()
+        self.fail_on_batch = fail_on_batch
+
+    def embed_documents(self, texts):
+        if len(self.calls) + 1 == self.fail_on_batch:
+            self.calls.append(list(texts))
+            raise RuntimeError("embedding request failed")
+        return super().embed_documents(texts)
+
+
+def _chunks(lengths: list[int]) -> list[Document]:
+    return [Document(page_content="x" * n) for n in lengths]
+
+
+def test_iter_batches_bounds_batch_size():
+    batches = list(iter_batches(_chunks([1] * 7), max_size=3, max_chars=1000))
+    assert [len(b) for b in batches] == [3, 3, 1]
+
+
+def test_iter_batches_bounds_total_characters():
+    batches = list(iter_batches(_chunks([40, 40, 40, 90, 10]), max_size=10, max_chars=100))
+    assert [[len(c.page_content) for c in b] for b in batches] == [[40, 40], [40], [90, 10]]
+
+
+def test_iter_batches_keeps_an_oversized_chunk_in_its_own_batch():
+    batches = list(iter_batches(_chunks([10, 500, 10]), max_size=10, max_chars=100))
+    assert [[len(c.page_content) for c in b] for b in batches] == [[10], [500], [10]]
+    assert list(iter_batches([], max_size=3)) == []
+
+
+@pytest.mark.parametrize("page_count, workers", [(1, 4), (7, 2), (12, 2), (100, 3)])
+def test_page_ranges_cover_every_page_once_in_order(page_count, workers):
+    ranges = _page_ranges(page_count, workers)
+
+    pages = [i for start, end in ranges for i in range(start, end)]
+    assert pages == list(range(page_count))
+    assert len(ranges) <= workers * 4
+    assert all(end > start for start, end in ranges)
+
+
+def test_parallel_and_serial_parsing_yield_the_same_pages(pdf_path, monkeypatch):
+    serial = list(iter_pages(pdf_path, workers=1))
+
+    monkeypatch.setattr(ingest, "INGEST_PARALLEL_MIN_PAGES", 2)
+    parallel = list(iter_pages(pdf_path, workers=2))
+
+    assert parallel == serial
+    assert [i for i, _ in serial] == list(range(len(PAGES)))
+    assert serial[3][1] == PAGES[3]
+
+
+def test_rows_are_written_in_document_order_under_concurrency(pdf_path, tmp_path):
+    embeddings = SlowFirstEmbeddings()
+    store_path = str(tmp_path / "store")
+
+    stats = ingest_pdf(pdf_path, store_path, embeddings, "fake", workers=1, concurrency=4, batch_size=2)
+
+    store = open_vector_store(store_path, embeddings)
+    assert stats["pages"] == len(PAGES)
+    assert stats["chunks"] == len(store) == len(PAGES)
+    assert stats["batches"] == len(PAGES) // 2
+    assert [d.page_content for d in store.documents] == PAGES
+    assert [d.metadata["page"] for d in store.documents] == list(range(len(PAGES)))
+
+    # Every row holds the embedding of its own chunk
+    expected = np.array([embeddings.embed_query(text) for text in PAGES], dtype=np.float32)
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(store.vectors, expected, atol=1e-6)
+
+
+def test_failed_embedding_batch_aborts_without_leaving_a_store(pdf_path, tmp_path):
+    store_path = str(tmp_path / "store")
+
+    with pytest.raises(RuntimeError, match="embedding request failed"):
+        ingest_pdf(pdf_path, store_path, FailingEmbeddings(fail_on_batch=3), workers=1, concurrency=2, batch_size=2)
+
+    assert not os.path.exists(store_path)
+    assert not os.path.exists(f"{store_path}.tmp")
+
+
+def test_pdf_without_text_is_rejected(tmp_path):
+    pdf_path = write_pdf(str(tmp_path / "empty.pdf"), ["", ""])
+
+    with pytest.raises(ValueError, match="No text could be extracted"):
+        ingest_pdf(pdf_path, str(tmp_path / "store"), FakeEmbeddings(), workers=1)
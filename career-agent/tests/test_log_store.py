@@ -0,0 +1,124 @@
+import datetime
+import os
+
+import pytest
+
+from tools import log_store
+
+
+class Clock:
+    def __init__(self, start: datetime.datetime):
+        self.now = start
+
+    def __call__(self) -> datetime.datetime:
+        return self.now
+
+    def advance(self, **kwargs) -> None:
+        self.now += datetime.timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_store, "LOGS_PATH", str(tmp_path / "logs.json"))
+    monkeypatch.setattr(log_store, "ARCHIVE_DIR", str(tmp_path / "log_archive"))
+    monkeypatch.setattr(log_store, "LOG_ROTATE_MAX_BYTES", 10 * 1024 * 1024)
+    monkeypatch.setattr(log_store, "LOG_ROTATE_MAX_AGE_DAYS", 7)
+    monkeypatch.setattr(log_store, "LOG_RETENTION_DAYS", 180)
+    monkeypatch.setattr(log_store, "LOG_COMPACT_AFTER_DAYS", 30)
+    clock = Clock(datetime.datetime(2025, 1, 1, 12, 0))
+    monkeypatch.setattr(log_store, "_now", clock)
+    return clock
+
+
+def _record(n: int) -> dict:
+    return {
+        "sender": f"sender-{n}",
+        "message": f"message {n}",
+        "final_response": "x" * 200,
+        "evaluation": {"total_score": 9, "scores": {"safety": 2}, "feedback": "ok"},
+    }
+
+
+def test_rotates_when_oldest_record_exceeds_max_age(clock):
+    log_store.append_log(_record(1))
+    clock.advance(days=3)
+    log_store.append_log(_record(2))
+    assert log_store.storage_stats()["segments"] == 0
+
+    clock.advance(days=5)
+    log_store.append_log(_record(3))
+
+    stats = log_store.storage_stats()
+    assert stats["segments"] == 1
+    assert stats["current_records"] == 0
+    assert [r["sender"] for r in log_store.read_logs()] == ["sender-1", "sender-2", "sender-3"]
+
+
+def test_rotates_when_file_exceeds_max_bytes(clock, monkeypatch):
+    monkeypatch.setattr(log_store, "LOG_ROTATE_MAX_BYTES", 1000)
+    for n in range(10):
+        log_store.append_log(_record(n))
+        clock.advance(minutes=1)
+
+    assert log_store.storage_stats()["segments"] >= 2
+    assert os.path.getsize(log_store.LOGS_PATH) < 1000
+    assert [r["sender"] for r in log_store.read_logs()] == [f"sender-{n}" for n in range(10)]
+
+
+def test_read_logs_orders_across_segments_and_applies_limit_and_since(clock):
+    for n in range(6):
+        log_store.append_log(_record(n))
+        if n % 2 == 1:
+            log_store.rotate()
+        clock.advance(days=1)
+
+    assert log_store.storage_stats()["segments"] == 3
+    assert [r["sender"] for r in log_store.read_logs()] == [f"sender-{n}" for n in range(6)]
+    assert [r["sender"] for r in log_store.read_logs(limit=3)] == ["sender-3", "sender-4", "sender-5"]
+    assert log_store.read_logs(limit=0) == []
+
+    since = datetime.datetime(2025, 1, 4, 12, 0)
+    assert [r["sender"] for r in log_store.read_logs(since=since)] == ["sender-3", "sender-4", "sender-5"]
+    assert log_store.read_logs(include_archived=False) == []
+
+
+def test_compaction_drops_bulky_fields_but_keeps_scores(clock):
+    log_store.append_log(_record(1))
+    log_store.rotate()
+
+    clock.advance(days=31)
+    log_store.rotate()
+
+    stats = log_store.storage_stats()
+    assert stats["segments"] == 1
+    assert stats["compacted_segments"] == 1
+
+    [record] = log_store.read_logs()
+    assert record["compacted"] is True
+    assert "final_response" not in record
+    assert record["final_response_chars"] == 200
+    assert "feedback" not in record["evaluation"]
+    assert record["evaluation"]["total_score"] == 9
+
+
+def test_retention_deletes_old_segments(clock):
+    log_store.append_log(_record(1))
+    log_store.rotate()
+    clock.advance(days=100)
+    log_store.append_log(_record(2))
+    log_store.rotate()
+
+    clock.advance(days=100)
+    assert log_store.apply_retention() == 1
+    assert [r["sender"] for r in log_store.read_logs()] == ["sender-2"]
+
+
+def test_clear_logs_removes_current_file_and_archive(clock):
+    log_store.append_log(_record(1))
+    log_store.rotate()
+    log_store.append_log(_record(2))
+
+    log_store.clear_logs()
+
+    assert log_store.read_logs() == []
+    assert log_store.storage_stats()["segments"] == 0
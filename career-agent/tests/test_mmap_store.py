@@ -0,0 +1,152 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from rag import mmap_store
+from rag.mmap_store import (
+    CHUNKS_FILE,
+    HEADER_SIZE,
+    VECTORS_FILE,
+    MmapStoreWriter,
+    convert_faiss_store,
+    open_vector_store,
+    read_header,
+    write_store,
+)
+from tests.fakes import FakeEmbeddings
+
+LEGACY_STORE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "vector_store")
+
+
+def _docs(n: int) -> list[Document]:
+    return [Document(page_content=f"chunk {i}", metadata={"page": i // 3}) for i in range(n)]
+
+
+def test_write_open_round_trip(tmp_path, fake_embeddings):
+    docs = _docs(6)
+    vectors = fake_embeddings.embed_documents([d.page_content for d in docs])
+    write_store(str(tmp_path / "store"), vectors, docs, embedding_model="fake-embedding")
+
+    store = open_vector_store(str(tmp_path / "store"), fake_embeddings)
+
+    assert len(store) == 6
+    assert store.dim == fake_embeddings.dim
+    assert store.embedding_model == "fake-embedding"
+    assert [d.page_content for d in store.documents] == [d.page_content for d in docs]
+    assert store.documents[4].metadata == {"page": 1}
+    assert np.allclose(np.linalg.norm(store.vectors, axis=1), 1.0)
+    assert isinstance(store.vectors, np.memmap)
+
+    # An exact text match is the nearest neighbour
+    assert store.similarity_search("chunk 4", k=1)[0].page_content == "chunk 4"
+    batch = store.similarity_search_batch(["chunk 1", "chunk 5"], k=2)
+    assert [docs[0].page_content for docs in batch] == ["chunk 1", "chunk 5"]
+
+
+def test_incremental_writer_matches_single_write(tmp_path, fake_embeddings):
+    docs = _docs(5)
+    vectors = fake_embeddings.embed_documents([d.page_content for d in docs])
+    with MmapStoreWriter(str(tmp_path / "store"), fake_embeddings.dim) as writer:
+        writer.add(vectors[:2], docs[:2])
+        writer.add(vectors[2:], docs[2:])
+
+    header = read_header(str(tmp_path / "store" / VECTORS_FILE))
+    assert header == {"version": mmap_store.FORMAT_VERSION, "dim": 8, "count": 5, "normalized": True}
+
+
+def test_empty_store(tmp_path, fake_embeddings):
+    MmapStoreWriter(str(tmp_path / "store"), fake_embeddings.dim).close()
+
+    store = open_vector_store(str(tmp_path / "store"), fake_embeddings)
+
+    assert len(store) == 0
+    assert store.similarity_search("anything", k=3) == []
+    assert store.similarity_search_batch(["a", "b"], k=3) == [[], []]
+
+
+def test_writer_rejects_wrong_shapes(tmp_path, fake_embeddings):
+    writer = MmapStoreWriter(str(tmp_path / "store"), fake_embeddings.dim)
+    with pytest.raises(ValueError):
+        writer.add(np.ones((2, 3)), _docs(2))
+    with pytest.raises(ValueError):
+        writer.add(np.ones((2, 8)), _docs(3))
+    writer.abort()
+
+
+def test_abort_leaves_no_tmp_directory_and_keeps_existing_store(tmp_path, fake_embeddings):
+    path = str(tmp_path / "store")
+    write_store(path, fake_embeddings.embed_documents(["old"]), [Document(page_content="old")])
+
+    with pytest.raises(RuntimeError):
+        with MmapStoreWriter(path, fake_embeddings.dim) as writer:
+            writer.add(fake_embeddings.embed_documents(["new"]), [Document(page_content="new")])
+            raise RuntimeError("embedding failed")
+
+    assert not os.path.exists(f"{path}.tmp")
+    assert [d.page_content for d in open_vector_store(path, fake_embeddings).documents] == ["old"]
+
+
+def _write_raw_header(path, magic=b"CVVSTORE", version=1, dim=4, count=2, payload_rows=2):
+    header = struct.pack("<8sIIQI", magic, version, dim, count, 1).ljust(HEADER_SIZE, b"\0")
+    with open(path, "wb") as f:
+        f.write(header + b"\0" * (4 * dim * payload_rows))
+    return str(path)
+
+
+def test_read_header_rejects_wrong_magic(tmp_path):
+    with pytest.raises(ValueError, match="Not a"):
+        read_header(_write_raw_header(tmp_path / VECTORS_FILE, magic=b"NOTASTOR"))
+
+
+def test_read_header_rejects_newer_version(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported vector store version"):
+        read_header(_write_raw_header(tmp_path / VECTORS_FILE, version=mmap_store.FORMAT_VERSION + 1))
+
+
+def test_read_header_rejects_truncated_files(tmp_path):
+    path = tmp_path / VECTORS_FILE
+    path.write_bytes(b"CVVSTORE")
+    with pytest.raises(ValueError, match="Truncated"):
+        read_header(str(path))
+
+    with pytest.raises(ValueError, match="shorter than its header"):
+        read_header(_write_raw_header(path, count=3, payload_rows=2))
+
+
+def test_open_rejects_chunk_and_vector_count_mismatch(tmp_path, fake_embeddings):
+    path = tmp_path / "store"
+    docs = _docs(3)
+    write_store(str(path), fake_embeddings.embed_documents([d.page_content for d in docs]), docs)
+
+    chunks = (path / CHUNKS_FILE).read_text(encoding="utf-8").splitlines()
+    (path / CHUNKS_FILE).write_text("\n".join(chunks[:-1]) + "\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Chunk file has 2 rows but vector file has 3"):
+        open_vector_store(str(path), fake_embeddings)
+
+
+def test_convert_faiss_store(tmp_path):
+    pytest.importorskip("faiss")
+    pytest.importorskip("langchain_community")
+    if not os.path.exists(os.path.join(LEGACY_STORE, "index.faiss")):
+        pytest.skip("no legacy FAISS store in data/vector_store")
+    from langchain_community.vectorstores import FAISS
+
+    embeddings = FakeEmbeddings(dim=1536)
+    legacy = FAISS.load_local(LEGACY_STORE, embeddings, allow_dangerous_deserialization=True)
+
+    n = convert_faiss_store(LEGACY_STORE, str(tmp_path / "store"), embeddings)
+    store = open_vector_store(str(tmp_path / "store"), embeddings)
+
+    assert n == len(store) == legacy.index.ntotal == 19
+    assert store.dim == 1536
+    assert store.embedding_model == "fake-embedding"
+    expected = [legacy.docstore.search(legacy.index_to_docstore_id[i]) for i in range(n)]
+    assert [d.page_content for d in store.documents] == [d.page_content for d in expected]
+
+    # Same nearest neighbours as the legacy index for a stored vector
+    query = legacy.index.reconstruct(7)
+    assert store.similarity_search_by_vector(query, k=1)[0].page_content == expected[7].page_content
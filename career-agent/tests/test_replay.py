@@ -0,0 +1,171 @@
+import json
+
+import httpx
+import pytest
+
+from rag import pdf_loader
+from tests.fakes import FakeOpenAI
+from tools import http_transport, log_store, replay
+from tools.replay import FixtureStore, RecordingTransport, ReplayTransport, summarize
+
+CHAT_PATH = "/v1/chat/completions"
+
+
+class Offline(httpx.BaseTransport):
+    """Inner transport for replay runs — any request that gets here is a test failure."""
+
+    def handle_request(self, request):
+        raise AssertionError(f"Replay touched the network: {request.url}")
+
+
+def _chat(content: str) -> dict:
+    return {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": content}]}
+
+
+def _send(transport: httpx.BaseTransport, scope: str, path: str, body: dict, host: str = "api.openai.com"):
+    token = replay._scope.set(scope)
+    try:
+        with httpx.Client(transport=transport) as client:
+            return client.post(f"https://{host}{path}", json=body)
+    finally:
+        replay._scope.reset(token)
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A fixture file holding two chat calls recorded for message "m1"."""
+    store = FixtureStore(str(tmp_path / "fixtures.jsonl"))
+    recorder = RecordingTransport(store, httpx.MockTransport(FakeOpenAI()))
+    first = _send(recorder, "m1", CHAT_PATH, _chat("EVALUATE this reply"))
+    _send(recorder, "m1", CHAT_PATH, _chat("Write a reply"))
+    return {"path": store.path, "recorder": recorder, "first": first.json()}
+
+
+def test_recording_appends_every_exchange(recorded):
+    fixtures = [json.loads(line) for line in open(recorded["path"], encoding="utf-8")]
+
+    assert [(f["scope"], f["path"], f["ordinal"]) for f in fixtures] == [("m1", CHAT_PATH, 0), ("m1", CHAT_PATH, 1)]
+    assert fixtures[0]["response"] == recorded["first"]
+    assert recorded["recorder"].stats["m1"]["matches"]["live"] == 2
+
+
+def test_replay_answers_identical_requests_exactly(recorded):
+    replayer = ReplayTransport(FixtureStore(recorded["path"]).load())
+
+    # Key order in the body does not matter
+    body = json.loads(json.dumps(_chat("EVALUATE this reply"), sort_keys=True))
+    response = _send(replayer, "m1", CHAT_PATH, body)
+
+    assert response.json() == recorded["first"]
+    stats = replayer.stats["m1"]
+    assert stats["matches"] == {"exact": 1, "position": 0, "miss": 0, "live": 0}
+    assert stats["prompt_tokens"] == recorded["first"]["usage"]["prompt_tokens"]
+
+
+def test_changed_request_falls_back_to_position_and_scales_prompt_tokens(recorded):
+    replayer = ReplayTransport(FixtureStore(recorded["path"]).load())
+    fixture = replayer.store.by_position[("m1", CHAT_PATH, 0)]
+
+    changed = _chat("EVALUATE this reply " + "with a much longer prompt " * 20)
+    response = _send(replayer, "m1", CHAT_PATH, changed)
+
+    assert response.json() == recorded["first"]  # Stale recorded answer
+    stats = replayer.stats["m1"]
+    assert stats["matches"]["position"] == 1
+    request_bytes = len(httpx.Request("POST", "https://x", json=changed).read())
+    expected = round(fixture["usage"]["prompt_tokens"] * request_bytes / fixture["request_bytes"])
+    assert stats["prompt_tokens"] == expected > fixture["usage"]["prompt_tokens"]
+
+
+def test_unknown_request_is_a_miss(recorded):
+    replayer = ReplayTransport(FixtureStore(recorded["path"]).load())
+
+    response = _send(replayer, "m2", CHAT_PATH, _chat("Something new"))
+
+    assert response.status_code == 404
+    assert response.json()["error"]["type"] == "fixture_miss"
+    assert replayer.stats["m2"]["matches"]["miss"] == 1
+
+
+def test_non_openai_hosts_are_stubbed(recorded):
+    replayer = ReplayTransport(FixtureStore(recorded["path"]).load())
+
+    response = _send(replayer, "m1", "/botTOKEN/sendMessage", {"text": "hi"}, host="api.telegram.org")
+
+    assert response.json() == {"ok": True, "stubbed": True}
+    assert "m1" not in replayer.stats
+
+
+def _result(**overrides) -> dict:
+    result = {
+        "status": "sent",
+        "error": None,
+        "approximate": False,
+        "attempts": 1,
+        "approved": True,
+        "calls": 4,
+        "prompt_tokens": 100,
+        "completion_tokens": 20,
+        "wall_ms": 10.0,
+        "recorded_latency_ms": 500.0,
+        "matches": {"exact": 4},
+    }
+    return {**result, **overrides}
+
+
+def test_summarize_aggregates_messages():
+    results = [
+        _result(),
+        _result(attempts=3, approved=False, approximate=True, matches={"exact": 2, "position": 2}),
+        _result(status="human_required", attempts=0, approved=False, calls=2, matches={"exact": 2}),
+        _result(status="error", error="APIStatusError: 404", calls=1, prompt_tokens=0, completion_tokens=0,
+                matches={"miss": 1}),
+    ]
+
+    summary = summarize(results)
+
+    assert summary["messages"] == 4
+    assert summary["errors"] == 1
+    assert summary["approximate"] == 1
+    assert summary["human_required"] == 1
+    assert summary["approval_rate"] == 0.5
+    assert summary["mean_attempts"] == 2
+    assert summary["calls_per_message"] == 2.75
+    assert summary["tokens_per_message"] == 90
+    assert summary["fixture_matches"] == {"exact": 8, "position": 2, "miss": 1, "live": 0}
+    assert summarize([])["approval_rate"] is None
+
+
+def test_record_then_replay_round_trip_is_offline_and_repeatable(fake_openai, cv_store, tmp_path, monkeypatch):
+    logs_path = log_store.LOGS_PATH
+    messages = replay.load_messages(
+        [
+            {"sender": "ACME", "message": "Would you be available for an interview next week?"},
+            {"sender": "ACME", "message": "Would you be available for an interview next week?"},
+            {"sender": "Globex", "message": "Can you tell us about your FastAPI experience?"},
+        ]
+    )
+    assert len(messages) == 2
+
+    fixtures_path = str(tmp_path / "fixtures.jsonl")
+    recorded = replay.run("record", messages, FixtureStore(fixtures_path))
+    live_calls = len(fake_openai.requests)
+    assert recorded["summary"]["errors"] == 0
+    assert recorded["summary"]["fixture_matches"]["live"] > 0
+
+    # Replay answers from fixtures only: no client may reach a real transport,
+    # and tiktoken (which would download its encoding) is not used
+    monkeypatch.setattr(http_transport, "make_pool_transport", Offline)
+    for _ in range(2):
+        replayed = replay.run("replay", messages, FixtureStore(fixtures_path).load())
+        summary = replayed["summary"]
+        assert summary["errors"] == 0
+        assert summary["approximate"] == 0
+        assert summary["fixture_matches"]["miss"] == summary["fixture_matches"]["position"] == 0
+        assert summary["fixture_matches"]["exact"] == sum(r["calls"] for r in recorded["messages"])
+        assert [r["status"] for r in replayed["messages"]] == [r["status"] for r in recorded["messages"]]
+
+    assert len(fake_openai.requests) == live_calls
+    assert log_store.LOGS_PATH == logs_path
+    assert pdf_loader.EMBEDDING_CHECK_CTX_LENGTH is True
+    assert pdf_loader._vector_store is None
@@ -0,0 +1,90 @@
+import pytest
+
+from tools.unknown_detector import (
+    HUMAN_CONFIDENCE_THRESHOLD,
+    evaluate_prefilter,
+    match_rules,
+    prefilter,
+    train_classifier,
+)
+
+ROUTINE = [
+    "We would like to invite you to an interview next week",
+    "Are you available for a quick call on Monday?",
+    "Thanks for applying, can you share your portfolio?",
+]
+
+
+@pytest.fixture
+def routine_model():
+    """A model that has only ever seen routine messages labelled 'no human'."""
+    examples = [(f"{m} {i}", False) for i in range(10) for m in ROUTINE]
+    examples.append(("Can we negotiate the salary and equity package?", True))
+    return train_classifier(examples)
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "What are your salary expectations?",
+        "Maaş beklentiniz nedir?",
+        "Can we negotiate the salary?",
+        "Is there a non-compete clause in the contract?",
+        "The offer includes stock options with a 4-year vesting schedule",
+        "Please review the contract terms before Friday",
+    ],
+)
+def test_negotiation_and_legal_terms_are_routed_to_a_human(message):
+    result = prefilter(message, model={})
+    assert result["requires_human"] is True
+    assert result["confidence_score"] >= HUMAN_CONFIDENCE_THRESHOLD
+    assert result["source"] == "rules"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Our platform serves 50k users",
+        "You will build a 4K video pipeline",
+        "We pay $5 per hour for the test task",
+        "We are committed to diversity, equity and inclusion",
+        "How do you handle liability in your ML models?",
+        "Bu sözleşmeli bir pozisyon",
+        "The salary is listed in the posting",
+    ],
+)
+def test_topic_mentions_are_deferred_to_the_llm(message):
+    assert prefilter(message, model={}) is None
+
+
+def test_rule_hint_keeps_the_classifier_from_deciding(routine_model):
+    message = "The salary is listed in the posting"
+    assert match_rules(message)["confidence_score"] < HUMAN_CONFIDENCE_THRESHOLD
+    assert prefilter(message, model=routine_model) is None
+
+
+def test_classifier_short_circuits_routine_messages(routine_model):
+    result = prefilter("We would like to invite you to an interview next week", model=routine_model)
+    assert result["requires_human"] is False
+    assert result["source"] == "classifier"
+
+
+def test_evaluation_scores_each_stage_on_its_own_decisions(routine_model):
+    examples = [
+        ("What are your salary expectations?", True),   # rules, agrees
+        ("Please review the contract terms", False),    # rules, disagrees
+        (ROUTINE[0], False),                            # classifier, agrees
+        ("The salary is listed in the posting", True),  # deferred
+    ]
+
+    report = evaluate_prefilter(routine_model, examples)
+
+    rules, classifier = report["stages"]["rules"], report["stages"]["classifier"]
+    assert rules["short_circuited"] == 2
+    assert rules["agreement"] == 0.5
+    assert rules["recall"] == 0.5
+    assert classifier["short_circuited"] == 1
+    assert classifier["agreement"] == 1.0
+    assert classifier["recall"] == 0.5
+    assert report["combined"]["short_circuited"] == 3
+    assert report["combined"]["confusion"] == {"tp": 2, "fp": 1, "fn": 0, "tn": 1}
@@ -0,0 +1,42 @@
+import json
+import os
+import threading
+
+# path → (mtime, document) — a file is re-read only when its mtime changes
+_cache: dict[str, tuple[float, object]] = {}
+_lock = threading.Lock()
+
+
+def load_json(path: str, description: str = "file"):
+    """
+    Returns the parsed JSON document at `path`, cached until the file changes.
+
+    Returns None if the file does not exist or cannot be read (a warning is
+    printed for unreadable files), so callers fall back to their defaults.
+
+    Args:
+        path       : JSON file to load
+        description: Used in the warning, e.g. "calibration file"
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        with _lock:
+            _cache.pop(path, None)
+        return None
+
+    with _lock:
+        cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            document = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️  Could not read {description}: {e}")
+        return None
+
+    with _lock:
+        _cache[path] = (mtime, document)
+    return document
@@ -0,0 +1,175 @@
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+from openai import OpenAI
+
+load_dotenv()
+
+# Timeouts (seconds)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+HTTP_WRITE_TIMEOUT = float(os.getenv("HTTP_WRITE_TIMEOUT", "30"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+
+# Connection pool
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120"))
+
+# HTTP/2 is used when the optional `h2` package is installed (pip install httpx[http2])
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") != "0"
+
+# One shared client for every outbound call (OpenAI, embeddings, Telegram)
+_client: httpx.Client | None = None
+_openai_client: OpenAI | None = None
+_lock = threading.Lock()
+
+_metrics_lock = threading.Lock()
+_metrics: dict = {}
+
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _reset_metrics() -> None:
+    with _metrics_lock:
+        _metrics.clear()
+        _metrics.update({"requests": 0, "connections_opened": 0, "hosts": {}})
+
+
+def _host_metrics(host: str) -> dict:
+    return _metrics["hosts"].setdefault(
+        host, {"requests": 0, "connections_opened": 0, "http_versions": {}}
+    )
+
+
+def _on_request(request: httpx.Request) -> None:
+    """Attaches an httpcore trace callback that counts new connections per host."""
+    host = request.url.host
+
+    def trace(event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with _metrics_lock:
+                _metrics["connections_opened"] += 1
+                _host_metrics(host)["connections_opened"] += 1
+
+    request.extensions["trace"] = trace
+
+
+def _on_response(response: httpx.Response) -> None:
+    with _metrics_lock:
+        _metrics["requests"] += 1
+        host = _host_metrics(response.request.url.host)
+        host["requests"] += 1
+        version = response.http_version
+        host["http_versions"][version] = host["http_versions"].get(version, 0) + 1
+
+
+def make_pool_transport() -> httpx.HTTPTransport:
+    """The real network transport: keep-alive pool, HTTP/2 when available."""
+    return httpx.HTTPTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def _build_client(transport: httpx.BaseTransport | None = None) -> httpx.Client:
+    return httpx.Client(
+        transport=transport or make_pool_transport(),
+        timeout=httpx.Timeout(
+            connect=HTTP_CONNECT_TIMEOUT,
+            read=HTTP_READ_TIMEOUT,
+            write=HTTP_WRITE_TIMEOUT,
+            pool=HTTP_POOL_TIMEOUT,
+        ),
+        event_hooks={"request": [_on_request], "response": [_on_response]},
+    )
+
+
+def init_transport(transport: httpx.BaseTransport | None = None) -> httpx.Client:
+    """
+    Creates the shared client. Called from the FastAPI lifespan on startup.
+
+    Args:
+        transport: Optional transport to send requests through instead of the
+                   network pool (used by the record/replay harness)
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _reset_metrics()
+            _client = _build_client(transport)
+            print(
+                f"🔌 HTTP transport ready (HTTP/2: {'on' if _http2_available() else 'off'}, "
+                f"pool: {HTTP_MAX_CONNECTIONS} max / {HTTP_MAX_KEEPALIVE} keep-alive)"
+            )
+        return _client
+
+
+def close_transport() -> None:
+    """Closes all pooled connections. Called from the FastAPI lifespan on shutdown."""
+    global _client, _openai_client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _openai_client = None
+
+
+def get_http_client() -> httpx.Client:
+    """Returns the shared client, creating it on first use (e.g. in CLI tools)."""
+    return _client if _client is not None else init_transport()
+
+
+def get_openai_client() -> OpenAI:
+    """Returns the OpenAI client bound to the shared connection pool."""
+    global _openai_client
+    client = _openai_client
+    if client is None:
+        http_client = get_http_client()
+        with _lock:
+            if _openai_client is None:
+                _openai_client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    http_client=http_client,
+                    timeout=http_client.timeout,  # OpenAI otherwise applies its own 600 s default
+                )
+            client = _openai_client
+    return client
+
+
+def transport_metrics() -> dict:
+    """
+    Returns request and connection counters since startup.
+
+    `connection_reuse_ratio` is the share of requests served on an already
+    open connection (1 - connections_opened / requests).
+    """
+    with _metrics_lock:
+        snapshot = {
+            "requests": _metrics.get("requests", 0),
+            "connections_opened": _metrics.get("connections_opened", 0),
+            "hosts": {
+                host: {**m, "http_versions": dict(m["http_versions"])}
+                for host, m in _metrics.get("hosts", {}).items()
+            },
+        }
+    requests = snapshot["requests"]
+    snapshot["connection_reuse_ratio"] = (
+        round(max(0.0, 1 - snapshot["connections_opened"] / requests), 3) if requests else None
+    )
+    snapshot["http2"] = _http2_available()
+    return snapshot
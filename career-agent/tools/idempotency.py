@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# How long a completed result is replayed for the same key
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+# Upper bound on stored results (oldest are evicted first)
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "1000"))
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an idempotency key is reused with a different request body."""
+
+
+def derive_key(sender_name: str, message: str) -> str:
+    """Derives a stable key from the sender and a hash of the message text."""
+    digest = hashlib.sha256(f"{sender_name.strip()}\n{message.strip()}".encode("utf-8"))
+    return f"derived:{digest.hexdigest()}"
+
+
+class IdempotencyStore:
+    """
+    Single-flight execution plus a short-lived result store.
+
+    - The first request for a key runs the pipeline.
+    - Concurrent requests with the same key await that same execution.
+    - The execution is not tied to any one request: it finishes and is stored
+      even if the request that started it is cancelled.
+    - Requests arriving after completion get the stored result until it expires.
+    - Failures are not stored; the next request runs the pipeline again.
+
+    All methods must be called from the event loop thread. State is kept in
+    memory, so keys are only coalesced within one process.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key → (fingerprint, pipeline task)
+        self._in_flight: dict[str, tuple[str, asyncio.Future]] = {}
+        # key → (fingerprint, expires_at, result)
+        self._completed: OrderedDict[str, tuple[str, float, Any]] = OrderedDict()
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (_, expires_at, _) in self._completed.items() if expires_at <= now]:
+            del self._completed[key]
+
+    @staticmethod
+    def _check_fingerprint(key: str, stored: str, fingerprint: str) -> None:
+        if stored != fingerprint:
+            raise IdempotencyConflict(
+                f"Idempotency key {key!r} was already used with a different request"
+            )
+
+    async def run(
+        self,
+        key: str,
+        fingerprint: str,
+        fn: Callable[[], Awaitable[Any]],
+    ) -> tuple[Any, bool]:
+        """
+        Runs `fn` at most once per key within the TTL window.
+
+        Args:
+            key        : Idempotency key (client-supplied or derived)
+            fingerprint: Hash of the request body, to detect key reuse
+            fn         : Coroutine factory that executes the pipeline
+
+        Returns:
+            tuple: (result, replayed) — replayed is True if `fn` was not run for this call
+        """
+        self._purge_expired()
+
+        if key in self._completed:
+            stored, _, result = self._completed[key]
+            self._check_fingerprint(key, stored, fingerprint)
+            return result, True
+
+        if key in self._in_flight:
+            stored, task = self._in_flight[key]
+            self._check_fingerprint(key, stored, fingerprint)
+            # shield: a cancelled waiter must not cancel the shared execution
+            return await asyncio.shield(task), True
+
+        # The pipeline runs as its own task, so cancelling the caller that
+        # started it (e.g. a client disconnect) neither cancels the waiters
+        # nor loses the result
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = (fingerprint, task)
+        task.add_done_callback(lambda t: self._finish(key, fingerprint, t))
+        return await asyncio.shield(task), False
+
+    def _finish(self, key: str, fingerprint: str, task: asyncio.Future) -> None:
+        """Done callback: stores a successful result, drops the in-flight entry."""
+        self._in_flight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:  # Also marks it retrieved — callers re-raise it themselves
+            return
+        self._completed[key] = (fingerprint, time.monotonic() + self.ttl_seconds, task.result())
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    def stats(self) -> dict:
+        self._purge_expired()
+        return {"in_flight": len(self._in_flight), "stored": len(self._completed)}
@@ -0,0 +1,271 @@
+import datetime
+import glob
+import gzip
+import json
+import os
+import re
+import shutil
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Paths relative to the project root
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGS_PATH = os.path.join(_BASE_DIR, "data", "logs.json")
+ARCHIVE_DIR = os.path.join(_BASE_DIR, "data", "log_archive")
+
+# Rotation: current logs.json is moved into a compressed segment when either limit is hit
+LOG_ROTATE_MAX_BYTES = int(os.getenv("LOG_ROTATE_MAX_BYTES", str(1024 * 1024)))
+LOG_ROTATE_MAX_AGE_DAYS = float(os.getenv("LOG_ROTATE_MAX_AGE_DAYS", "7"))
+# Retention: segments whose newest record is older than this are deleted (0 = keep forever)
+LOG_RETENTION_DAYS = float(os.getenv("LOG_RETENTION_DAYS", "180"))
+# Compaction: segments older than this lose bulky text fields (0 = never compact)
+LOG_COMPACT_AFTER_DAYS = float(os.getenv("LOG_COMPACT_AFTER_DAYS", "30"))
+# Default page size for GET /logs, so a request never decompresses the whole archive
+LOG_READ_DEFAULT_LIMIT = int(os.getenv("LOG_READ_DEFAULT_LIMIT", "500"))
+
+_TS_FORMAT = "%Y%m%dT%H%M%S%f"
+# logs-<first>-<last>.jsonl.gz  |  logs-<first>-<last>.c.jsonl.gz (compacted)
+_SEGMENT_RE = re.compile(r"^logs-(\d{8}T\d{12})-(\d{8}T\d{12})(\.c)?\.jsonl\.gz$")
+
+# Records may be written from worker threads — serialize all file access
+_lock = threading.RLock()
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now()
+
+
+def _record_time(record: dict) -> datetime.datetime:
+    try:
+        return datetime.datetime.fromisoformat(record["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return _now()
+
+
+def _read_current() -> list[dict]:
+    try:
+        with open(LOGS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+
+def _write_current(logs: list[dict]) -> None:
+    with open(LOGS_PATH, "w", encoding="utf-8") as f:
+        json.dump(logs, f, indent=2, ensure_ascii=False)
+
+
+def _list_segments() -> list[dict]:
+    """Returns archived segments sorted oldest first, parsed from their file names."""
+    segments = []
+    for path in glob.glob(os.path.join(ARCHIVE_DIR, "logs-*.jsonl.gz")):
+        match = _SEGMENT_RE.match(os.path.basename(path))
+        if not match:
+            continue
+        segments.append(
+            {
+                "path": path,
+                "first": datetime.datetime.strptime(match.group(1), _TS_FORMAT),
+                "last": datetime.datetime.strptime(match.group(2), _TS_FORMAT),
+                "compacted": bool(match.group(3)),
+            }
+        )
+    segments.sort(key=lambda s: (s["first"], s["last"]))
+    return segments
+
+
+def _read_segment(path: str) -> list[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _write_segment(records: list[dict], compacted: bool = False) -> str:
+    first = min(_record_time(r) for r in records)
+    last = max(_record_time(r) for r in records)
+    name = f"logs-{first.strftime(_TS_FORMAT)}-{last.strftime(_TS_FORMAT)}"
+    path = os.path.join(ARCHIVE_DIR, f"{name}{'.c' if compacted else ''}.jsonl.gz")
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, path)
+    return path
+
+
+def _should_rotate(logs: list[dict]) -> bool:
+    if not logs:
+        return False
+    if os.path.getsize(LOGS_PATH) >= LOG_ROTATE_MAX_BYTES:
+        return True
+    if LOG_ROTATE_MAX_AGE_DAYS > 0:
+        age = _now() - _record_time(logs[0])
+        return age >= datetime.timedelta(days=LOG_ROTATE_MAX_AGE_DAYS)
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def compact_record(record: dict) -> dict:
+    """
+    Drops bulky free-text fields from a log record while keeping everything
+    the dashboard and analyses use (scores, type, attempts, detection result).
+    """
+    compacted = dict(record)
+
+    if "final_response" in compacted:
+        compacted["final_response_chars"] = len(compacted.pop("final_response") or "")
+
+    if isinstance(compacted.get("evaluation"), dict):
+        compacted["evaluation"] = {
+            k: v
+            for k, v in compacted["evaluation"].items()
+            if k not in ("feedback", "suggestions")
+        }
+
+    if isinstance(compacted.get("detection"), dict):
+        compacted["detection"] = {
+            k: v for k, v in compacted["detection"].items() if k != "reason"
+        }
+    compacted.pop("reason", None)
+
+    compacted["compacted"] = True
+    return compacted
+
+
+def append_log(data: dict) -> None:
+    """Timestamps a record, appends it to logs.json and rotates if needed."""
+    with _lock:
+        logs = _read_current()
+        data["timestamp"] = _now().isoformat()
+        logs.append(data)
+        _write_current(logs)
+
+        if _should_rotate(logs):
+            rotate()
+
+
+def rotate() -> str | None:
+    """
+    Moves the current logs.json into a compressed archive segment, then
+    applies retention and compaction to the archive.
+
+    Returns:
+        str | None: Path of the new segment (None if there was nothing to rotate)
+    """
+    with _lock:
+        logs = _read_current()
+        path = None
+        if logs:
+            path = _write_segment(logs)
+            _write_current([])
+            print(f"[Logs] Rotated {len(logs)} records → {os.path.basename(path)}")
+
+        apply_retention()
+        compact_segments()
+        return path
+
+
+def apply_retention() -> int:
+    """Deletes segments whose newest record is older than LOG_RETENTION_DAYS."""
+    if LOG_RETENTION_DAYS <= 0:
+        return 0
+
+    cutoff = _now() - datetime.timedelta(days=LOG_RETENTION_DAYS)
+    removed = 0
+    with _lock:
+        for segment in _list_segments():
+            if segment["last"] < cutoff:
+                os.remove(segment["path"])
+                removed += 1
+    return removed
+
+
+def compact_segments() -> int:
+    """Rewrites segments older than LOG_COMPACT_AFTER_DAYS without bulky fields."""
+    if LOG_COMPACT_AFTER_DAYS <= 0:
+        return 0
+
+    cutoff = _now() - datetime.timedelta(days=LOG_COMPACT_AFTER_DAYS)
+    compacted = 0
+    with _lock:
+        for segment in _list_segments():
+            if segment["compacted"] or segment["last"] >= cutoff:
+                continue
+            records = [compact_record(r) for r in _read_segment(segment["path"])]
+            _write_segment(records, compacted=True)
+            os.remove(segment["path"])
+            compacted += 1
+    return compacted
+
+
+def read_logs(
+    since: datetime.datetime | None = None,
+    limit: int | None = None,
+    include_archived: bool = True,
+) -> list[dict]:
+    """
+    Returns log records in chronological order, reading transparently across
+    the current file and archived segments.
+
+    Args:
+        since           : Only records at or after this time
+        limit           : Only the most recent `limit` records
+        include_archived: Also read compressed segments
+
+    Segments are skipped by the time range in their file name, and reading
+    stops as soon as `limit` records have been collected, so a bounded query
+    only opens the newest segments.
+    """
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone().replace(tzinfo=None)  # Records use naive local time
+
+    with _lock:
+        def keep(record: dict) -> bool:
+            return since is None or _record_time(record) >= since
+
+        records = [r for r in _read_current() if keep(r)]
+
+        if include_archived:
+            for segment in reversed(_list_segments()):
+                if limit is not None and len(records) >= limit:
+                    break
+                if since is not None and segment["last"] < since:
+                    break  # Segments are time-ordered — everything older is out of range
+                records = [r for r in _read_segment(segment["path"]) if keep(r)] + records
+
+    if limit is not None:
+        records = records[-limit:] if limit > 0 else []
+    return records
+
+
+def clear_logs() -> None:
+    """Deletes the current log file contents and every archived segment."""
+    with _lock:
+        _write_current([])
+        shutil.rmtree(ARCHIVE_DIR, ignore_errors=True)
+
+
+def storage_stats() -> dict:
+    """Returns record counts and on-disk size of the current file and archive."""
+    with _lock:
+        segments = _list_segments()
+        return {
+            "current_records": len(_read_current()),
+            "current_bytes": os.path.getsize(LOGS_PATH) if os.path.exists(LOGS_PATH) else 0,
+            "segments": len(segments),
+            "compacted_segments": sum(1 for s in segments if s["compacted"]),
+            "archive_bytes": sum(os.path.getsize(s["path"]) for s in segments),
+            "oldest_archived": segments[0]["first"].isoformat() if segments else None,
+        }
@@ -1,11 +1,15 @@
 import os
-import requests
+import httpx
 from dotenv import load_dotenv
+from tools.http_transport import get_http_client
 
 load_dotenv()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+# Notifications are fire-and-forget — don't hold the pipeline for the
+# full HTTP_READ_TIMEOUT meant for LLM calls
+TELEGRAM_READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", "10"))
 
 
 def send_notification(message: str, notification_type: str = "info") -> bool:
@@ -41,7 +45,15 @@ def send_notification(message: str, notification_type: str = "info") -> bool:
     }
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        # Shared keep-alive pool — no new TCP+TLS handshake per notification
+        client = get_http_client()
+        timeout = httpx.Timeout(
+            connect=client.timeout.connect,
+            read=TELEGRAM_READ_TIMEOUT,
+            write=client.timeout.write,
+            pool=client.timeout.pool,
+        )
+        response = client.post(url, json=payload, timeout=timeout)
         if response.status_code == 200:
             print(f"[Telegram] {emoji} Notification sent.")
             return True
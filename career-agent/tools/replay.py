@@ -0,0 +1,461 @@
+"""
+Record/replay regression harness for the agent pipeline.
+
+    python -m tools.replay record                   # run logged messages online, capture fixtures
+    python -m tools.replay replay                   # re-run offline from fixtures, print report
+    python -m tools.replay replay --save-baseline   # store this run as the baseline
+    python -m tools.replay replay --baseline data/replay/baseline.json
+
+Every unique message in the interaction logs is re-executed through
+run_pipeline() with the shared HTTP client swapped for a recording or
+replaying transport:
+
+    record — OpenAI requests (chat + embeddings) go to the network and each
+             request/response pair is appended to data/replay/fixtures.jsonl
+    replay — no network; each request is answered from the fixture store
+
+Replay matches a request exactly (method + path + body) first. When a change
+to prompts or retrieval alters the request body, it falls back to the fixture
+recorded at the same position (message, endpoint, call number) and token usage
+is scaled by the request size — the run still completes offline, and the
+report shows how many calls were exact vs. approximated. Telegram and any
+other non-OpenAI host get a stub 200 response in both modes.
+
+Logs written by the pipeline during a run go to a temporary directory.
+"""
+
+import argparse
+import contextvars
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPLAY_DIR = os.path.join(_BASE_DIR, "data", "replay")
+FIXTURES_PATH = os.path.join(REPLAY_DIR, "fixtures.jsonl")
+BASELINE_PATH = os.path.join(REPLAY_DIR, "baseline.json")
+
+OPENAI_HOSTS = {"api.openai.com", urlsplit(os.getenv("OPENAI_BASE_URL", "")).hostname}
+
+# Message currently being executed — fixtures are grouped by it
+_scope: contextvars.ContextVar[str] = contextvars.ContextVar("replay_scope", default="")
+
+
+# ---------------------------------------------------------------------------
+# Fixture store
+# ---------------------------------------------------------------------------
+
+
+def _request_key(method: str, path: str, body: bytes) -> str:
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False)
+    except (ValueError, UnicodeDecodeError):
+        canonical = body.decode("utf-8", errors="replace")
+    return hashlib.sha256(f"{method} {path}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class FixtureStore:
+    """Request/response pairs indexed by exact key and by (scope, path, ordinal)."""
+
+    def __init__(self, path: str = FIXTURES_PATH):
+        self.path = path
+        self.by_key: dict[str, dict] = {}
+        self.by_position: dict[tuple[str, str, int], dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "FixtureStore":
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+        return self
+
+    def _index(self, fixture: dict) -> None:
+        self.by_key.setdefault(fixture["key"], fixture)
+        self.by_position[(fixture["scope"], fixture["path"], fixture["ordinal"])] = fixture
+
+    def append(self, fixture: dict) -> None:
+        with self._lock:
+            self._index(fixture)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(fixture, ensure_ascii=False) + "\n")
+
+    def __len__(self) -> int:
+        return len(self.by_position)
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+
+class _HarnessTransport(httpx.BaseTransport):
+    """Shared bookkeeping: per-scope call ordinals and per-scope call stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ordinals: dict[tuple[str, str], int] = {}
+        self.stats: dict[str, dict] = {}
+
+    def _next_ordinal(self, scope: str, path: str) -> int:
+        with self._lock:
+            ordinal = self._ordinals.get((scope, path), 0)
+            self._ordinals[(scope, path)] = ordinal + 1
+            return ordinal
+
+    def _count(self, scope: str, path: str, usage: dict, elapsed_ms: float, match: str) -> None:
+        with self._lock:
+            s = self.stats.setdefault(
+                scope,
+                {
+                    "calls": {},
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "recorded_latency_ms": 0.0,
+                    "matches": {"exact": 0, "position": 0, "miss": 0, "live": 0},
+                },
+            )
+            s["calls"][path] = s["calls"].get(path, 0) + 1
+            s["prompt_tokens"] += int(usage.get("prompt_tokens", 0))
+            s["completion_tokens"] += int(usage.get("completion_tokens", 0))
+            s["recorded_latency_ms"] += elapsed_ms
+            s["matches"][match] += 1
+
+    @staticmethod
+    def _stub(request: httpx.Request) -> httpx.Response:
+        # Telegram (and anything else) — never leave the harness
+        return httpx.Response(200, json={"ok": True, "stubbed": True}, request=request)
+
+
+class RecordingTransport(_HarnessTransport):
+    """Sends OpenAI requests to the network and appends each exchange to the store."""
+
+    def __init__(self, store: FixtureStore, inner: httpx.BaseTransport):
+        super().__init__()
+        self.store = store
+        self.inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host not in OPENAI_HOSTS:
+            return self._stub(request)
+
+        body = request.read()
+        scope, path = _scope.get(), request.url.path
+        ordinal = self._next_ordinal(scope, path)
+
+        start = time.perf_counter()
+        response = self.inner.handle_request(request)
+        content = response.read()  # Decoded — content-encoding is dropped below
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        response.close()
+
+        try:
+            response_body = json.loads(content)
+        except ValueError:
+            response_body = content.decode("utf-8", errors="replace")
+        usage = response_body.get("usage") or {} if isinstance(response_body, dict) else {}
+
+        self.store.append(
+            {
+                "key": _request_key(request.method, path, body),
+                "scope": scope,
+                "path": path,
+                "ordinal": ordinal,
+                "request_bytes": len(body),
+                "status": response.status_code,
+                "response": response_body,
+                "usage": usage,
+                "elapsed_ms": round(elapsed_ms, 1),
+            }
+        )
+        self._count(scope, path, usage, elapsed_ms, "live")
+
+        headers = {"content-type": response.headers.get("content-type", "application/json")}
+        return httpx.Response(response.status_code, headers=headers, content=content, request=request)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class ReplayTransport(_HarnessTransport):
+    """Answers OpenAI requests from the fixture store without touching the network."""
+
+    def __init__(self, store: FixtureStore):
+        super().__init__()
+        self.store = store
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host not in OPENAI_HOSTS:
+            return self._stub(request)
+
+        body = request.read()
+        scope, path = _scope.get(), request.url.path
+        ordinal = self._next_ordinal(scope, path)
+
+        fixture = self.store.by_key.get(_request_key(request.method, path, body))
+        match = "exact"
+        if fixture is None:
+            fixture = self.store.by_position.get((scope, path, ordinal))
+            match = "position"
+
+        if fixture is None:
+            self._count(scope, path, {}, 0.0, "miss")
+            # 404 is not retried by the OpenAI client — the message fails fast
+            return httpx.Response(
+                404,
+                json={"error": {"message": f"No replay fixture for {path} #{ordinal}", "type": "fixture_miss"}},
+                request=request,
+            )
+
+        usage = dict(fixture.get("usage") or {})
+        if match == "position" and fixture.get("request_bytes"):
+            # Estimate prompt tokens for a changed request by its size
+            ratio = len(body) / fixture["request_bytes"]
+            usage["prompt_tokens"] = round(int(usage.get("prompt_tokens", 0)) * ratio)
+        self._count(scope, path, usage, float(fixture.get("elapsed_ms", 0.0)), match)
+
+        return httpx.Response(fixture["status"], json=fixture["response"], request=request)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+
+def load_messages(logs: list[dict], limit: int | None = None) -> list[dict]:
+    """Unique (sender, message) pairs from the logs, in first-seen order."""
+    from tools.idempotency import derive_key
+
+    seen, messages = set(), []
+    for record in logs:
+        if not record.get("message"):
+            continue
+        key = derive_key(record.get("sender", ""), record["message"])
+        if key in seen:
+            continue
+        seen.add(key)
+        messages.append({"id": key, "sender_name": record.get("sender", ""), "message": record["message"]})
+    return messages[:limit] if limit else messages
+
+
+def run(mode: str, messages: list[dict], store: FixtureStore) -> dict:
+    """
+    Executes every message through the pipeline under the given transport.
+    The shared HTTP client, RAG caches and log paths are restored afterwards,
+    so run() can be called repeatedly in one process.
+
+    Returns:
+        dict: {"mode", "messages": [per-message result], "summary": {...}}
+    """
+    from rag import pdf_loader
+    from rag.pdf_loader import close_vector_store
+    from tools import http_transport, log_store
+
+    transport = (
+        RecordingTransport(store, http_transport.make_pool_transport())
+        if mode == "record"
+        else ReplayTransport(store)
+    )
+    # The vector store (and the retriever's cached results) follow the client swap.
+    # tiktoken's token-length check would download its encoding around the
+    # harness transport — and send token ids instead of text — so both modes
+    # embed raw text.
+    saved_check_ctx_length = pdf_loader.EMBEDDING_CHECK_CTX_LENGTH
+    pdf_loader.EMBEDDING_CHECK_CTX_LENGTH = False
+    http_transport.close_transport()
+    close_vector_store()
+    http_transport.init_transport(transport=transport)
+
+    # Keep the pipeline's own logging out of the real log files
+    saved_paths = (log_store.LOGS_PATH, log_store.ARCHIVE_DIR)
+    tmp_dir = tempfile.mkdtemp(prefix="replay-logs-")
+    log_store.LOGS_PATH = os.path.join(tmp_dir, "logs.json")
+    log_store.ARCHIVE_DIR = os.path.join(tmp_dir, "log_archive")
+
+    results = []
+    try:
+        from main import EmployerMessage, run_pipeline
+        from rag import retriever
+
+        # Fixed identity/summary queries are cached process-wide — warm them once
+        token = _scope.set("__warmup__")
+        try:
+            retriever._get_fixed_query_docs()
+        finally:
+            _scope.reset(token)
+
+        for item in messages:
+            token = _scope.set(item["id"])
+            start = time.perf_counter()
+            error = None
+            try:
+                outcome = run_pipeline(
+                    EmployerMessage(sender_name=item["sender_name"], message=item["message"])
+                )
+            except Exception as e:
+                outcome, error = {}, f"{type(e).__name__}: {e}"
+            finally:
+                _scope.reset(token)
+            wall_ms = (time.perf_counter() - start) * 1000
+
+            stats = transport.stats.get(item["id"], {})
+            matches = stats.get("matches", {})
+            results.append(
+                {
+                    "id": item["id"],
+                    "message": item["message"][:80],
+                    "status": outcome.get("status", "error"),
+                    "error": error,
+                    "attempts": outcome.get("attempts", 0),
+                    "approved": bool(outcome.get("evaluation", {}).get("approved")),
+                    "score": outcome.get("evaluation", {}).get("score"),
+                    "calls": sum(stats.get("calls", {}).values()),
+                    "calls_by_endpoint": stats.get("calls", {}),
+                    "prompt_tokens": stats.get("prompt_tokens", 0),
+                    "completion_tokens": stats.get("completion_tokens", 0),
+                    "wall_ms": round(wall_ms, 1),
+                    "recorded_latency_ms": round(stats.get("recorded_latency_ms", 0.0), 1),
+                    "matches": matches,
+                    # Served by a position-fallback fixture: the prompt changed,
+                    # so the recorded response is stale and the result approximate
+                    "approximate": matches.get("position", 0) > 0,
+                }
+            )
+    finally:
+        http_transport.close_transport()
+        close_vector_store()
+        pdf_loader.EMBEDDING_CHECK_CTX_LENGTH = saved_check_ctx_length
+        log_store.LOGS_PATH, log_store.ARCHIVE_DIR = saved_paths
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return {"mode": mode, "messages": results, "summary": summarize(results)}
+
+
+def summarize(results: list[dict]) -> dict:
+    n = len(results) or 1
+    sent = [r for r in results if r["status"] == "sent"]
+    matches = {"exact": 0, "position": 0, "miss": 0, "live": 0}
+    for r in results:
+        for k, v in r["matches"].items():
+            matches[k] += v
+
+    return {
+        "messages": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "approximate": sum(1 for r in results if r["approximate"]),
+        "human_required": sum(1 for r in results if r["status"] == "human_required"),
+        "approval_rate": round(sum(r["approved"] for r in sent) / len(sent), 3) if sent else None,
+        "mean_attempts": round(sum(r["attempts"] for r in sent) / len(sent), 3) if sent else None,
+        "calls_per_message": round(sum(r["calls"] for r in results) / n, 3),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in results),
+        "completion_tokens": sum(r["completion_tokens"] for r in results),
+        "tokens_per_message": round(
+            sum(r["prompt_tokens"] + r["completion_tokens"] for r in results) / n, 1
+        ),
+        "wall_ms": round(sum(r["wall_ms"] for r in results), 1),
+        "recorded_latency_ms": round(sum(r["recorded_latency_ms"] for r in results), 1),
+        "fixture_matches": matches,
+    }
+
+
+_REPORT_FIELDS = [
+    "messages",
+    "errors",
+    "approximate",
+    "human_required",
+    "approval_rate",
+    "mean_attempts",
+    "calls_per_message",
+    "prompt_tokens",
+    "completion_tokens",
+    "tokens_per_message",
+    "wall_ms",
+    "recorded_latency_ms",
+]
+
+
+def print_report(report: dict, baseline: dict | None = None) -> None:
+    summary = report["summary"]
+    print(f"\n📊 Replay report ({report['mode']})\n")
+    print(f"   {'id':<12} {'status':<15} {'att':>3} {'calls':>5} {'tokens':>7} {'wall ms':>8}  message")
+    for r in report["messages"]:
+        tokens = r["prompt_tokens"] + r["completion_tokens"]
+        print(
+            f"   {r['id'][8:20]:<12} {r['status']:<15} {r['attempts']:>3} {r['calls']:>5} "
+            f"{tokens:>7} {r['wall_ms']:>8.1f}  {r['message']}"
+        )
+        if r["error"]:
+            print(f"      ❌ {r['error']}")
+        if r.get("approximate"):
+            print(f"      ≈ approximate — {r['matches']['position']} call(s) answered by a stale fixture (prompt changed)")
+
+    base = baseline["summary"] if baseline else {}
+    print(f"\n   {'metric':<22} {'current':>12}" + (f" {'baseline':>12} {'delta':>10}" if base else ""))
+    for field in _REPORT_FIELDS:
+        current = summary.get(field)
+        line = f"   {field:<22} {_fmt(current):>12}"
+        if base:
+            previous = base.get(field)
+            line += f" {_fmt(previous):>12} {_delta(current, previous):>10}"
+        print(line)
+    print(f"\n   Fixture matches: {summary['fixture_matches']}")
+
+
+def _fmt(value) -> str:
+    return "—" if value is None else f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+
+def _delta(current, previous) -> str:
+    if not isinstance(current, (int, float)) or not isinstance(previous, (int, float)):
+        return ""
+    if previous == 0:
+        return "±0" if current == 0 else "new"
+    return f"{(current - previous) / previous:+.1%}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record/replay regression harness")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline report to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N messages")
+    args = parser.parse_args()
+
+    from tools.log_store import read_logs
+
+    messages = load_messages(read_logs(), args.limit)
+
+    if args.mode == "record":
+        os.makedirs(os.path.dirname(args.fixtures), exist_ok=True)
+        open(args.fixtures, "w").close()  # Fresh recording
+        store = FixtureStore(args.fixtures)
+    else:
+        if not os.path.exists(args.fixtures):
+            raise SystemExit(f"❌ No fixtures at {args.fixtures} — run `python -m tools.replay record` first")
+        store = FixtureStore(args.fixtures).load()
+
+    print(f"▶️  {args.mode}: {len(messages)} messages, {len(store)} fixtures loaded")
+    report = run(args.mode, messages, store)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ Baseline saved: {args.baseline}")
@@ -1,17 +1,235 @@
+import argparse
+import hashlib
 import json
+import math
 import os
-from openai import OpenAI
+import re
+import time
 from dotenv import load_dotenv
+from tools.file_cache import load_json
+from tools.http_transport import get_openai_client
 from rag.retriever import retrieve_full_cv_summary
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Detections at or above this confidence are routed to a human
+HUMAN_CONFIDENCE_THRESHOLD = 0.8
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREFILTER_MODEL_PATH = os.path.join(_BASE_DIR, "data", "prefilter_model.json")
+
+# Classifier short-circuits "no human needed" only below this P(human)
+PREFILTER_MAX_HUMAN_PROBABILITY = float(os.getenv("PREFILTER_MAX_HUMAN_PROBABILITY", "0.05"))
+# The classifier stays disabled until it has been trained on this many messages
+PREFILTER_MIN_SAMPLES = int(os.getenv("PREFILTER_MIN_SAMPLES", "30"))
+
+# ---------------------------------------------------------------------------
+# Stage 1a — keyword/regex rules (clear "human required" cases)
+# ---------------------------------------------------------------------------
+
+# Rules only decide when the wording is specific to a negotiation or a legal
+# term; a bare topic mention ("the salary is listed in the posting", "diversity,
+# equity and inclusion") scores below HUMAN_CONFIDENCE_THRESHOLD and is deferred
+# to the LLM detector instead of being decided locally.
+RULE_CONFIDENCE = 0.9
+RULE_HINT_CONFIDENCE = 0.5
+
+# (category, pattern, confidence, reason) — English and Turkish phrasings,
+# checked in order (decisive rules first)
+_RULES = [
+    (
+        "salary_negotiation",
+        re.compile(
+            r"\b((salary|compensation|pay)\s+(expectations?|requirements?|negotiations?)|"
+            r"(expected|desired|target)\s+(salary|compensation|pay)|"
+            r"negotiat\w*\s+((the|your|a|our)\s+)?(salary|compensation|pay|offer|rate)|"
+            r"how\s+much\s+(do|would)\s+you\s+(expect|want|ask)|counter[-\s]?offer|"
+            r"(maaş|ücret)\s+beklenti\w*|beklediğiniz\s+(maaş|ücret)|"
+            r"(maaş|ücret)\w*\s+(pazarlı\w*|müzakere\w*))",
+            re.IGNORECASE,
+        ),
+        RULE_CONFIDENCE,
+        "Message asks for salary expectations or negotiates compensation.",
+    ),
+    (
+        "legal",
+        re.compile(
+            r"\b(non[-\s]?compete|rekabet\s+yasağı|non[-\s]?solicit\w*|"
+            r"non[-\s]?disclosure|nda|confidentiality\s+agreement|gizlilik\s+sözleşmesi)\b",
+            re.IGNORECASE,
+        ),
+        RULE_CONFIDENCE,
+        "Message contains non-compete or confidentiality terms.",
+    ),
+    (
+        "legal",
+        re.compile(
+            r"\b(stock\s+options?|rsus?|vesting\s+(schedule|period|cliff)|"
+            r"equity\s+(stake|grant|package|compensation|offer)|hisse\s+(opsiyon\w*|senedi))\b",
+            re.IGNORECASE,
+        ),
+        RULE_CONFIDENCE,
+        "Message contains equity or stock-option terms.",
+    ),
+    (
+        "legal",
+        re.compile(
+            r"\b((legal|contract)\s+(terms|clauses?|obligations?)|indemnif\w+|"
+            r"(intellectual\s+property|ip)\s+(assignment|clauses?|rights)|"
+            r"sözleşme\s+(maddeleri\w*|şartları\w*|koşulları\w*))\b",
+            re.IGNORECASE,
+        ),
+        RULE_CONFIDENCE,
+        "Message contains legal or contract details.",
+    ),
+    (
+        "ambiguous",
+        re.compile(
+            r"\b(salary|salaries|compensation|maaş\w*|ücret\w*|equity|liabilit\w+|"
+            r"contract\w*|sözleşme\w*)\b",
+            re.IGNORECASE,
+        ),
+        RULE_HINT_CONFIDENCE,
+        "Message mentions pay or contract topics without a clear negotiation.",
+    ),
+]
+
+
+def match_rules(employer_message: str) -> dict | None:
+    """
+    Returns the detection of the first matching keyword rule, else None.
+
+    Hits below HUMAN_CONFIDENCE_THRESHOLD are hints, not decisions — see
+    prefilter().
+    """
+    for category, pattern, confidence, reason in _RULES:
+        if pattern.search(employer_message):
+            return {
+                "requires_human": True,
+                "confidence_score": confidence,
+                "reason": reason,
+                "category": category,
+                "source": "rules",
+            }
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Stage 1b — Naive Bayes classifier trained on logged LLM detections
+# (clear "no human needed" cases)
+# ---------------------------------------------------------------------------
+
+
+def _tokenize(text: str) -> list[str]:
+    words = re.findall(r"\w+", text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _label(detection: dict) -> bool:
+    """Training label: would the pipeline have routed this message to a human?"""
+    return bool(detection.get("requires_human")) and float(
+        detection.get("confidence_score", 0.0)
+    ) >= HUMAN_CONFIDENCE_THRESHOLD
+
+
+def train_classifier(examples: list[tuple[str, bool]]) -> dict:
+    """
+    Trains a multinomial Naive Bayes model (word unigrams + bigrams).
+
+    Args:
+        examples: (message, routed_to_human) pairs
+
+    Returns:
+        dict: JSON-serializable model
+    """
+    token_counts = {"0": {}, "1": {}}
+    class_counts = {"0": 0, "1": 0}
+    for message, label in examples:
+        cls = "1" if label else "0"
+        class_counts[cls] += 1
+        for token in _tokenize(message):
+            token_counts[cls][token] = token_counts[cls].get(token, 0) + 1
+
+    return {
+        "samples": len(examples),
+        "class_counts": class_counts,
+        "token_counts": token_counts,
+        "token_totals": {cls: sum(c.values()) for cls, c in token_counts.items()},
+        "vocabulary_size": len(set(token_counts["0"]) | set(token_counts["1"])),
+    }
+
+
+def predict_human_probability(model: dict, employer_message: str) -> float:
+    """Returns P(routed to human | message) under the Naive Bayes model."""
+    vocab = model["vocabulary_size"] + 1
+    total = model["samples"]
+    log_odds = math.log((model["class_counts"]["1"] + 1) / (total + 2)) - math.log(
+        (model["class_counts"]["0"] + 1) / (total + 2)
+    )
+    for token in _tokenize(employer_message):
+        p1 = (model["token_counts"]["1"].get(token, 0) + 1) / (model["token_totals"]["1"] + vocab)
+        p0 = (model["token_counts"]["0"].get(token, 0) + 1) / (model["token_totals"]["0"] + vocab)
+        log_odds += math.log(p1) - math.log(p0)
+
+    log_odds = max(min(log_odds, 50.0), -50.0)
+    return 1.0 / (1.0 + math.exp(-log_odds))
+
+
+def _is_usable(model: dict) -> bool:
+    """A model needs enough samples and both classes before it may short-circuit."""
+    counts = model.get("class_counts", {})
+    return model.get("samples", 0) >= PREFILTER_MIN_SAMPLES and bool(counts.get("0")) and bool(counts.get("1"))
+
+
+def load_classifier() -> dict | None:
+    """Returns the trained model if present and trained on enough data, else None."""
+    model = load_json(PREFILTER_MODEL_PATH, "pre-filter model")  # Reloaded when the file changes
+    return model if model and _is_usable(model) else None
+
+
+def prefilter(employer_message: str, model: dict | None = None) -> dict | None:
+    """
+    Fast local first stage. Rules catch clear human-required cases; the
+    classifier catches clear routine messages. Returns None when uncertain,
+    meaning the LLM detector should decide — including when only a rule hint
+    (confidence below HUMAN_CONFIDENCE_THRESHOLD) matched, so a message that
+    touches on pay or contracts is never waved through by the classifier.
+
+    Args:
+        employer_message: The employer's incoming message
+        model           : Classifier to use (default: data/prefilter_model.json;
+                          an empty dict disables the classifier stage)
+    """
+    ruled = match_rules(employer_message)
+    if ruled:
+        return ruled if ruled["confidence_score"] >= HUMAN_CONFIDENCE_THRESHOLD else None
+
+    model = load_classifier() if model is None else model
+    if model:
+        p_human = predict_human_probability(model, employer_message)
+        if p_human <= PREFILTER_MAX_HUMAN_PROBABILITY:
+            return {
+                "requires_human": False,
+                "confidence_score": round(1.0 - p_human, 3),
+                "reason": "Routine message (local classifier).",
+                "category": "none",
+                "source": "classifier",
+            }
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Stage 2 — LLM detector
+# ---------------------------------------------------------------------------
 
 
 def detect_unknown(employer_message: str) -> dict:
     """
     Determines whether a message requires human intervention.
 
+    Clear cases are decided by the local pre-filter (see prefilter());
+    only uncertain messages cost an LLM call.
+
     Args:
         employer_message: The employer's incoming message
 
@@ -20,9 +238,14 @@ def detect_unknown(employer_message: str) -> dict:
             "requires_human": bool,
             "confidence_score": float,  # 0.0 - 1.0
             "reason": str,
-            "category": str             # salary_negotiation | out_of_domain | legal | ambiguous | none
+            "category": str,            # salary_negotiation | out_of_domain | legal | ambiguous | none
+            "source": str               # rules | classifier | llm
         }
     """
+    prefiltered = prefilter(employer_message)
+    if prefiltered:
+        return prefiltered
+
     # RAG: Retrieve full CV summary (skills, domains, experience)
     cv_summary = retrieve_full_cv_summary()
 
@@ -51,7 +274,7 @@ Return only JSON, nothing else:
 }}
 """
 
-    response = client.chat.completions.create(
+    response = get_openai_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": detection_prompt}],
         temperature=0.2,
@@ -66,4 +289,127 @@ Return only JSON, nothing else:
         "confidence_score": float(result.get("confidence_score", 0.0)),
         "reason": str(result.get("reason", "")),
         "category": str(result.get("category", "none")),
+        "source": "llm",
     }
+
+
+# ---------------------------------------------------------------------------
+# Offline training and evaluation
+# ---------------------------------------------------------------------------
+
+
+def _is_held_out(message: str, fraction: float) -> bool:
+    """Deterministic split by message hash — duplicates land on the same side."""
+    digest = hashlib.sha256(" ".join(message.lower().split()).encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / 2**32 < fraction
+
+
+def load_examples(logs: list[dict]) -> list[tuple[str, bool]]:
+    """Extracts (message, label) pairs from records decided by the LLM detector."""
+    examples = []
+    for record in logs:
+        detection = record.get("detection")
+        if not isinstance(detection, dict) or detection.get("source", "llm") != "llm":
+            continue  # Skip pre-filter decisions — never train on our own output
+        examples.append((record.get("message", ""), _label(detection)))
+    return examples
+
+
+def evaluate_prefilter(model: dict, examples: list[tuple[str, bool]]) -> dict:
+    """
+    Compares pre-filter decisions with the LLM labels.
+
+    Each stage is scored only on the messages it short-circuited:
+        agreement: share of its decisions that match the LLM label
+        recall   : share of all messages with the label it predicts
+                   (human for rules, routine for the classifier) that it caught
+
+    `combined` is the end-to-end two-stage detector, where deferred messages
+    take the LLM label.
+    """
+    stages = {
+        name: {"short_circuited": 0, "agreed": 0, "label_total": 0}
+        for name in ("rules", "classifier")
+    }
+    tp = fp = fn = tn = 0
+    elapsed = 0.0
+    for message, label in examples:
+        stages["rules"]["label_total"] += label
+        stages["classifier"]["label_total"] += not label
+
+        start = time.perf_counter()
+        result = prefilter(message, model=model)
+        elapsed += time.perf_counter() - start
+
+        if result is None:
+            predicted = label
+        else:
+            predicted = result["requires_human"] and result["confidence_score"] >= HUMAN_CONFIDENCE_THRESHOLD
+            stage = stages[result["source"]]
+            stage["short_circuited"] += 1
+            stage["agreed"] += predicted == label
+
+        tp += predicted and label
+        fp += predicted and not label
+        fn += (not predicted) and label
+        tn += (not predicted) and not label
+
+    n = len(examples)
+    decided = sum(stage["short_circuited"] for stage in stages.values())
+    return {
+        "examples": n,
+        "stages": {
+            name: {
+                "short_circuited": stage["short_circuited"],
+                "coverage": stage["short_circuited"] / n if n else 0.0,
+                "agreement": stage["agreed"] / stage["short_circuited"] if stage["short_circuited"] else 0.0,
+                "recall": stage["agreed"] / stage["label_total"] if stage["label_total"] else 0.0,
+            }
+            for name, stage in stages.items()
+        },
+        "combined": {
+            "short_circuited": decided,
+            "coverage": decided / n if n else 0.0,
+            "precision": tp / (tp + fp) if tp + fp else 0.0,
+            "recall": tp / (tp + fn) if tp + fn else 0.0,
+            "confusion": {"tp": tp, "fp": fp, "fn": fn, "tn": tn},
+        },
+        "mean_latency_us": elapsed / n * 1e6 if n else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    # python -m tools.unknown_detector [--holdout 0.2] [--dry-run]
+    from tools.log_store import read_logs
+
+    parser = argparse.ArgumentParser(description="Train and evaluate the unknown-detector pre-filter")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Held-out fraction")
+    parser.add_argument("--dry-run", action="store_true", help="Evaluate only, do not save a model")
+    args = parser.parse_args()
+
+    examples = load_examples(read_logs())
+    train = [e for e in examples if not _is_held_out(e[0], args.holdout)]
+    held_out = [e for e in examples if _is_held_out(e[0], args.holdout)]
+
+    print(f"📊 Pre-filter: {len(examples)} LLM-labelled messages "
+          f"({len(train)} train / {len(held_out)} held out)\n")
+
+    candidate = train_classifier(train)
+    report = evaluate_prefilter(candidate if _is_usable(candidate) else {}, held_out)
+    for name, stage in report["stages"].items():
+        print(f"   {name.capitalize():<11}: short-circuited {stage['short_circuited']}/{report['examples']} "
+              f"({stage['coverage']:.0%}), agreement with LLM {stage['agreement']:.0%}, "
+              f"recall {stage['recall']:.0%}")
+    combined = report["combined"]
+    print(f"   Combined   : precision {combined['precision']:.2f}, recall {combined['recall']:.2f} "
+          f"(deferred messages take the LLM label), confusion {combined['confusion']}")
+    print(f"   Latency    : {report['mean_latency_us']:.1f} µs/message")
+    if len(train) < PREFILTER_MIN_SAMPLES:
+        print(f"\n⚠️  Fewer than {PREFILTER_MIN_SAMPLES} training messages — "
+              "the classifier stage stays disabled until more logs accumulate (rules still apply).")
+
+    if not args.dry_run:
+        model = train_classifier(examples)  # Final model uses every labelled message
+        with open(PREFILTER_MODEL_PATH, "w", encoding="utf-8") as f:
+            json.dump(model, f, ensure_ascii=False)
+        print(f"\n✅ Pre-filter model saved: {PREFILTER_MODEL_PATH}")